@@ -0,0 +1,169 @@
+"""
+Admission control in front of every Groq completion.
+
+The Groq quota is shared by all sessions, so each completion first reserves
+its estimated tokens against process-wide tokens-per-minute and
+requests-per-minute budgets. Waiting requests are served strictly by
+priority (research answers before Gym Bro translations) and wait at most a
+bounded time. When the queue is full a new request evicts the newest waiter
+of lower priority, and is only rejected itself if there is none. Retries,
+hedges and fallbacks of an admitted request are charged with charge(), so
+the window counts every HTTP request actually sent.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TPM_LIMIT   = int(os.getenv("GYMIQ_TPM_LIMIT", "12000"))
+RPM_LIMIT   = int(os.getenv("GYMIQ_RPM_LIMIT", "30"))
+MAX_QUEUE   = int(os.getenv("GYMIQ_MAX_QUEUE", "32"))
+MAX_WAIT_S  = float(os.getenv("GYMIQ_MAX_WAIT", "15"))
+WINDOW_S    = 60.0
+CHARS_PER_TOKEN = 4   # rough prompt-size estimate until response.usage arrives
+
+PRIORITY_RESEARCH    = 0
+PRIORITY_TRANSLATION = 1
+PRIORITY_SPECULATIVE = 2
+
+
+class AdmissionRejected(RuntimeError):
+    pass
+
+
+def estimate_tokens(messages: list[dict], max_tokens: int) -> int:
+    prompt_chars = sum(len(m.get("content", "")) for m in messages)
+    return prompt_chars // CHARS_PER_TOKEN + max_tokens
+
+
+class AdmissionController:
+    def __init__(self, tpm_limit: int, rpm_limit: int, max_queue: int, max_wait: float):
+        self.tpm_limit = tpm_limit
+        self.rpm_limit = rpm_limit
+        self.max_queue = max_queue
+        self.max_wait  = max_wait
+
+        self._cond    = threading.Condition()
+        self._queue   = []             # heap of (priority, seq)
+        self._evicted = set()          # entries pushed out of a full queue by a higher priority
+        self._seq     = itertools.count()
+        self._window  = deque()        # [admitted_at, tokens] for the last WINDOW_S
+        self._tokens  = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._charged  = 0
+
+    def _prune(self, now: float):
+        while self._window and now - self._window[0][0] >= WINDOW_S:
+            self._tokens -= self._window.popleft()[1]
+
+    def _has_budget(self, tokens: int) -> bool:
+        if len(self._window) >= self.rpm_limit:
+            return False
+        # A single request larger than the whole budget still runs once the window is empty.
+        return self._tokens + tokens <= self.tpm_limit or not self._window
+
+    def _busy_message(self) -> str:
+        return (
+            f"GymIQ is handling too many questions right now ({len(self._queue)} queued). "
+            "Please try again in a moment."
+        )
+
+    def _reject(self, message: str):
+        self._rejected += 1
+        raise AdmissionRejected(message)
+
+    def acquire(self, tokens: int, priority: int, max_wait: Optional[float] = None) -> list:
+        """Block until the request fits the budget; return a ticket for reconcile()."""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                worst = max(self._queue)   # lowest priority, newest first
+                if worst[0] <= priority:
+                    self._reject(self._busy_message())
+                self._queue.remove(worst)
+                heapq.heapify(self._queue)
+                self._evicted.add(worst)
+                self._cond.notify_all()
+
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._queue, entry)
+            deadline = time.monotonic() + max_wait
+            try:
+                while True:
+                    if entry in self._evicted:
+                        self._evicted.discard(entry)
+                        self._reject(self._busy_message())
+                    now = time.monotonic()
+                    self._prune(now)
+                    if self._queue[0] == entry and self._has_budget(tokens):
+                        heapq.heappop(self._queue)
+                        ticket = [now, tokens]
+                        self._window.append(ticket)
+                        self._tokens += tokens
+                        self._admitted += 1
+                        self._cond.notify_all()
+                        return ticket
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._reject(
+                            "GymIQ is at its AI usage limit right now. "
+                            "Please try again in a minute."
+                        )
+                    next_expiry = self._window[0][0] + WINDOW_S - now if self._window else remaining
+                    self._cond.wait(timeout=max(0.01, min(remaining, next_expiry)))
+            except BaseException:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                raise
+
+    def charge(self, tokens: int) -> list:
+        """Count a follow-up request of an admitted call without queueing it; return its ticket."""
+        with self._cond:
+            now = time.monotonic()
+            self._prune(now)
+            ticket = [now, tokens]
+            self._window.append(ticket)
+            self._tokens += tokens
+            self._charged += 1
+            return ticket
+
+    def reconcile(self, ticket: list, actual_tokens: int):
+        """Replace a ticket's estimate with the tokens Groq actually billed."""
+        with self._cond:
+            if any(t is ticket for t in self._window):
+                self._tokens += actual_tokens - ticket[1]
+            ticket[1] = actual_tokens
+            self._cond.notify_all()
+
+    def metrics(self) -> dict:
+        with self._cond:
+            self._prune(time.monotonic())
+            by_priority = {}
+            for priority, _ in self._queue:
+                by_priority[priority] = by_priority.get(priority, 0) + 1
+            return {
+                "queue_depth":          len(self._queue),
+                "queued_by_priority":   by_priority,
+                "tokens_last_minute":   self._tokens,
+                "requests_last_minute": len(self._window),
+                "tpm_limit":            self.tpm_limit,
+                "rpm_limit":            self.rpm_limit,
+                "admitted_total":       self._admitted,
+                "rejected_total":       self._rejected,
+                "charged_total":        self._charged,
+            }
+
+
+controller = AdmissionController(TPM_LIMIT, RPM_LIMIT, MAX_QUEUE, MAX_WAIT_S)
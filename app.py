@@ -1,124 +1,13 @@
 import os
+import time
 import streamlit as st
-from dotenv import load_dotenv
-from pinecone import Pinecone
-from groq import Groq
-from sentence_transformers import SentenceTransformer
 
-load_dotenv()
+import admission
+import speculation
+import tracing
+from rag import answer_question, translate_to_gymbro
 
-LLM_MODEL      = "llama-3.3-70b-versatile"
-PINECONE_INDEX = "gymiq"
-
-_embedder = None
-_pinecone_index = None
-
-
-def get_embedder() -> SentenceTransformer:
-    global _embedder
-    if _embedder is None:
-        _embedder = SentenceTransformer("all-MiniLM-L6-v2")
-    return _embedder
-
-
-def embed_query(text: str) -> list[float]:
-    return get_embedder().encode(text).tolist()
-
-
-def get_groq_client() -> Groq:
-    return Groq(api_key=os.getenv("GROQ_API_KEY"))
-
-
-def get_pinecone_index():
-    global _pinecone_index
-    if _pinecone_index is None:
-        pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-        _pinecone_index = pc.Index(PINECONE_INDEX)
-    return _pinecone_index
-
-
-def answer_question(question: str) -> tuple[str, list[dict]]:
-    query_embedding = embed_query(question)
-
-    results = get_pinecone_index().query(
-        vector=query_embedding,
-        top_k=20,
-        include_metadata=True,
-    )
-
-    docs  = [m.metadata.get("text", "") for m in results.matches]
-    metas = [m.metadata for m in results.matches]
-    context = "\n\n---\n\n".join(docs)
-
-    response = get_groq_client().chat.completions.create(
-        model=LLM_MODEL,
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are a fitness and sports science assistant. "
-                    "You are given multiple PubMed research abstracts. Your job is to synthesize findings across ALL of them, not just one. "
-                    "Important rules:\n"
-                    "- If studies conflict, report BOTH sides (e.g. 'some studies show X, while others find Y')\n"
-                    "- Do not draw a conclusion from a single study if others contradict it\n"
-                    "- Note if results depend on dose, population, or training status\n"
-                    "- Be specific and cite findings, but keep the answer practical\n"
-                    "- If none of the abstracts are relevant, say: 'I couldn't find relevant research on this in the database.'"
-                ),
-            },
-            {
-                "role": "user",
-                "content": f"Research abstracts:\n{context}\n\nQuestion: {question}",
-            },
-        ],
-        temperature=0,
-        max_tokens=512,
-    )
-
-    answer = response.choices[0].message.content
-
-    sources = [
-        {
-            "text": doc,
-            "question": meta.get("question", ""),
-            "pubmed_id": meta.get("pubmed_id", ""),
-            "source": meta.get("source", "pubmed"),
-            "name": meta.get("name", ""),
-        }
-        for doc, meta in zip(docs, metas)
-    ]
-
-    return answer, sources
-
-
-def translate_to_gymbro(scientific_answer: str) -> str:
-    response = get_groq_client().chat.completions.create(
-        model=LLM_MODEL,
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are a hyped-up gym bro who translates scientific fitness research into "
-                    "simple, energetic gym slang. Use words like: bro, gains, swole, jacked, "
-                    "crushing it, beast mode, pump, PR, grind, no days off, get after it. "
-                    "Keep the actual facts accurate but make it sound like you're hyping up "
-                    "your buddy before a workout. Keep it short — 3 to 5 sentences max. "
-                    "If the original answer says there's no info available, say something like "
-                    "'Bro the science hasn't caught up to your grind yet, but keep lifting!'"
-                ),
-            },
-            {
-                "role": "user",
-                "content": f"Translate this into gym bro language:\n\n{scientific_answer}",
-            },
-        ],
-        temperature=0.8,
-        max_tokens=200,
-    )
-    return response.choices[0].message.content
-
-
-# ── UI ──────────────────────────────────────────────────────────────────────
+tracing.start_exporters()
 
 st.set_page_config(page_title="GymIQ", page_icon="🏋️", layout="centered")
 
@@ -183,16 +72,22 @@ question = st.text_input(
     label_visibility="collapsed",
 )
 
-if question:
+# Button clicks rerun the script; only answer when the question actually changes.
+if question and question != st.session_state.get("last_question"):
     with st.spinner("Searching 65,000+ research chunks..."):
         try:
             answer, sources = answer_question(question)
+            st.session_state["last_question"] = question
             st.session_state["last_answer"] = answer
             st.session_state["last_sources"] = sources
             st.session_state.pop("bro_translation", None)
+            speculation.on_answer(answer, translate_to_gymbro)
+        except admission.AdmissionRejected as e:
+            st.warning(str(e))
         except Exception as e:
             st.error(f"Error: {e}")
 
+render_start = time.perf_counter()
 if "last_answer" in st.session_state:
     st.markdown("### 🔬 Research Says")
     st.write(st.session_state["last_answer"])
@@ -201,9 +96,17 @@ if "last_answer" in st.session_state:
     col1, col2 = st.columns([1, 3])
     with col1:
         if st.button("💪 Gym Bro Mode"):
+            # The translation is traced as llm_gymbro; leave it out of render.
+            handler_start = time.perf_counter()
             with st.spinner("Getting hyped..."):
-                bro = translate_to_gymbro(st.session_state["last_answer"])
-                st.session_state["bro_translation"] = bro
+                try:
+                    bro = speculation.get_translation(
+                        st.session_state["last_answer"], translate_to_gymbro
+                    )
+                    st.session_state["bro_translation"] = bro
+                except admission.AdmissionRejected as e:
+                    st.warning(str(e))
+            render_start += time.perf_counter() - handler_start
 
     if "bro_translation" in st.session_state:
         st.markdown("### 💪 Gym Bro Says")
@@ -232,5 +135,27 @@ if "last_answer" in st.session_state:
                 f"{badge} **{title}**{pmid_str}" if title else f"{badge}{pmid_str}",
                 unsafe_allow_html=True,
             )
+            for sentence in source.get("evidence", []):
+                st.markdown(f"> {sentence}")
             st.caption(source["text"])
             st.divider()
+tracing.observe("render", time.perf_counter() - render_start)
+
+if os.getenv("GYMIQ_ADMIN") == "1":
+    with st.sidebar:
+        st.markdown("### ⚙️ Pipeline Metrics")
+        if not tracing.TRACING_ENABLED:
+            st.caption("Set GYMIQ_TRACING=1 to record stage latencies.")
+        snap = tracing.snapshot()
+        if snap["stages"]:
+            st.table([
+                {"stage": stage, **{k: round(v, 1) for k, v in s.items() if k.endswith("_ms")}, "count": s["count"]}
+                for stage, s in sorted(snap["stages"].items())
+            ])
+        st.markdown("**Groq budget**")
+        st.json(admission.controller.metrics())
+        st.markdown("**Gym Bro cache**")
+        st.json(speculation.stats())
+        if snap["counters"]:
+            st.markdown("**Counters**")
+            st.json(snap["counters"])
@@ -0,0 +1,164 @@
+"""
+Headless bulk question answering.
+
+    python ask_batch.py questions.jsonl answers.jsonl
+    python ask_batch.py questions.csv answers.jsonl --concurrency 8 --batch-size 256
+
+Input is JSONL ({"question": ..., "id": ...}) or CSV with a `question`
+column and optional `id` column. Each batch of questions is split into
+sub-queries and embedded in one encode() call, the Pinecone searches run
+concurrently, and the LLM syntheses fan out over a bounded pool (still
+subject to the shared Groq admission budget) while the next batch is
+retrieved. Answers and sources are appended to the output JSONL as they
+finish, and a batch whose retrieval fails gets an error record per
+question; rerunning with the same output file skips every id already
+answered.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import rag
+from tracing import span
+
+SEARCH_BATCH = 256
+MAX_WAIT_S   = 600   # long enough to wait out several per-minute budget windows
+
+
+def read_questions(path: str) -> list[dict]:
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    items = []
+    for row in rows:
+        question = (row.get("question") or "").strip()
+        if not question:
+            continue
+        item_id = row.get("id")
+        if item_id in (None, ""):
+            item_id = hashlib.sha256(question.encode()).hexdigest()[:16]
+        items.append({"id": str(item_id), "question": question})
+    return items
+
+
+def completed_ids(path: str) -> set[str]:
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut off by an interrupted run; it gets redone
+            if "answer" in record:
+                done.add(record["id"])
+    return done
+
+
+def retrieve_batch(items: list[dict]) -> list[tuple]:
+    """
+    Embed every sub-query of the batch in one call, then search them all
+    concurrently. Returns (matches, query embeddings) for each question.
+    """
+    plans = [rag.plan_subqueries(item["question"]) for item in items]
+    flat = [q for plan in plans for q in plan]
+    with span("embed"):
+        vectors = rag.get_embedder().encode(flat, batch_size=SEARCH_BATCH)
+
+    per_question, start = [], 0
+    for plan in plans:
+        per_question.append(vectors[start:start + len(plan)])
+        start += len(plan)
+
+    with ThreadPoolExecutor(max_workers=16, thread_name_prefix="batch-search") as pool:
+        matches = pool.map(rag.search, [v.tolist() for v in per_question])
+        return list(zip(matches, per_question))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="questions as .jsonl or .csv")
+    parser.add_argument("output", help="answers .jsonl (also the checkpoint)")
+    parser.add_argument("--batch-size", type=int, default=SEARCH_BATCH, help="questions embedded and searched together")
+    parser.add_argument("--concurrency", type=int, default=4, help="LLM syntheses in flight")
+    parser.add_argument("--max-wait", type=float, default=MAX_WAIT_S,
+                        help="seconds a synthesis may wait for Groq budget before it is recorded as failed")
+    args = parser.parse_args()
+
+    items = read_questions(args.input)
+    done = completed_ids(args.output)
+    todo = [item for item in items if item["id"] not in done]
+    print(f"{len(items)} questions, {len(items) - len(todo)} already answered, {len(todo)} to go")
+    if not todo:
+        return
+
+    write_lock = threading.Lock()
+    finished = failed = 0
+    start = time.perf_counter()
+
+    def answer(item: dict, retrieved: tuple) -> dict:
+        matches, query_vectors = retrieved
+        answer_text, sources = rag.synthesize(item["question"], matches, query_vectors, max_wait=args.max_wait)
+        return {
+            **item,
+            "answer": answer_text,
+            "sources": [{k: v for k, v in s.items() if k != "text"} for s in sources],
+        }
+
+    batches = [todo[b:b + args.batch_size] for b in range(0, len(todo), args.batch_size)]
+    with open(args.output, "a") as out, \
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-retrieve") as retrieve_pool, \
+            ThreadPoolExecutor(max_workers=args.concurrency) as llm_pool:
+
+        def write(record: dict):
+            with write_lock:
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+
+        # The next batch is retrieved while the current batch's syntheses run.
+        retrieval = retrieve_pool.submit(retrieve_batch, batches[0])
+        for i, batch in enumerate(batches):
+            try:
+                batch_retrieved = retrieval.result()
+            except Exception as e:
+                batch_retrieved = None
+                for item in batch:
+                    write({**item, "error": f"retrieval failed: {e}"})
+                failed += len(batch)
+            if i + 1 < len(batches):
+                retrieval = retrieve_pool.submit(retrieve_batch, batches[i + 1])
+            if batch_retrieved is not None:
+                futures = {
+                    llm_pool.submit(answer, item, retrieved): item
+                    for item, retrieved in zip(batch, batch_retrieved)
+                }
+                for future in as_completed(futures):
+                    try:
+                        record = future.result()
+                        finished += 1
+                    except Exception as e:
+                        record = {**futures[future], "error": str(e)}
+                        failed += 1
+                    write(record)
+
+            elapsed = time.perf_counter() - start
+            print(f"  {finished + failed}/{len(todo)} done ({failed} failed) · {finished / elapsed:.2f} answers/s")
+
+    elapsed = time.perf_counter() - start
+    print(f"\nDone! {finished} answered, {failed} failed in {elapsed:.1f}s "
+          f"({finished / elapsed:.2f} answers/s). Failed items are retried on the next run.")
+
+
+if __name__ == "__main__":
+    main()
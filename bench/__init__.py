@@ -0,0 +1,8 @@
+"""
+Offline benchmarks for GymIQ. Everything runs against deterministic local
+fakes (bench.fakes) and synthetic corpora (bench.corpus), so no Pinecone,
+Groq or dataset downloads are needed.
+
+    python -m bench.run --out bench_results.json
+    python -m bench.compare old.json new.json
+"""
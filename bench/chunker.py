@@ -0,0 +1,84 @@
+"""
+Chunker throughput: data/chunking.py (fast and compat modes) against
+LangChain's RecursiveCharacterTextSplitter.
+
+    python -m bench.chunker --abstracts 20000
+    python -m bench.chunker --input data/fitness_abstracts.json --out chunker.json
+
+Each splitter runs over the same texts (synthetic abstracts by default) and
+the best of --repeat runs is reported. Compat mode is also checked to
+produce exactly LangChain's chunks. LangChain is optional; without it only
+the two local modes are timed.
+"""
+
+import argparse
+import json
+import time
+
+from bench import corpus
+from bench.run import import_ingestion
+
+
+def time_splitter(split, texts: list[str], repeat: int) -> dict:
+    best, chunks = float("inf"), 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        chunks = sum(len(split(t)) for t in texts)
+        best = min(best, time.perf_counter() - t0)
+    return {
+        "chunks":       chunks,
+        "seconds":      best,
+        "chunks_per_s": chunks / best,
+        "mb_per_s":     sum(map(len, texts)) / best / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--abstracts", type=int, default=20000, help="synthetic abstracts to split")
+    parser.add_argument("--input", help="split a real abstracts JSON file instead")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write results as JSON for bench.compare")
+    args = parser.parse_args()
+
+    chunking = import_ingestion("chunking")
+    if args.input:
+        with open(args.input) as f:
+            records = json.load(f)
+    else:
+        records = corpus.make_abstracts(args.abstracts, seed=args.seed)
+    texts = [chunking.abstract_text(r) for r in records]
+    print(f"{len(texts)} texts, {sum(map(len, texts)) / 1e6:.1f} MB")
+
+    splitters = {"fast": chunking.split_fast, "compat": chunking.split_compat}
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        lc = RecursiveCharacterTextSplitter(chunk_size=chunking.CHUNK_SIZE, chunk_overlap=chunking.CHUNK_OVERLAP)
+        splitters["langchain"] = lc.split_text
+    except ImportError:
+        lc = None
+        print("langchain-text-splitters not installed; skipping the baseline")
+
+    results = {name: time_splitter(split, texts, args.repeat) for name, split in splitters.items()}
+
+    if lc is not None:
+        mismatched = sum(chunking.split_compat(t) != lc.split_text(t) for t in texts)
+        results["compat_mismatched_texts"] = mismatched
+        print(f"compat vs LangChain: {mismatched} of {len(texts)} texts differ")
+
+    baseline = results.get("langchain")
+    for name in splitters:
+        r = results[name]
+        speedup = f" · {r['chunks_per_s'] / baseline['chunks_per_s']:.1f}x LangChain" if baseline else ""
+        print(f"  {name:<10} {r['chunks']:>8} chunks · {r['chunks_per_s']:>10,.0f} chunks/s · "
+              f"{r['mb_per_s']:.1f} MB/s{speedup}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"meta": {"config": vars(args)}, "chunker": results}, f, indent=2)
+        print(f"Saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
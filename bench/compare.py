@@ -0,0 +1,57 @@
+"""
+Compares two bench.run result files and flags regressions.
+
+    python -m bench.compare baseline.json candidate.json --threshold 10
+
+Latency metrics (*_ms) regress when they grow; throughput metrics (*_per_s)
+regress when they shrink. Exits with status 1 if any metric regresses by
+more than the threshold percentage.
+"""
+
+import argparse
+import json
+import sys
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        if key == "meta":
+            continue
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + "."))
+        elif isinstance(value, (int, float)) and (key.endswith("_ms") or key.endswith("_per_s")):
+            flat[path] = value
+    return flat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        base = flatten(json.load(f))
+    with open(args.candidate) as f:
+        cand = flatten(json.load(f))
+
+    regressions = 0
+    for metric in sorted(base.keys() & cand.keys()):
+        old, new = base[metric], cand[metric]
+        if not old:
+            continue
+        change = (new - old) * 100 / old
+        worse = change > args.threshold if metric.endswith("_ms") else change < -args.threshold
+        regressions += worse
+        flag = "  REGRESSION" if worse else ""
+        print(f"{metric:<55} {old:>12.2f} → {new:>12.2f}  ({change:+6.1f}%){flag}")
+
+    print(f"\n{regressions} regression(s) beyond {args.threshold:.0f}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Synthetic, seeded corpora shaped like the real inputs: PubMed QA records as
+in data/fitness_abstracts.json and data/supplement_abstracts.json, and
+ExerciseDB records as in data/exercises.jsonl.
+"""
+
+import random
+
+TOPICS = [
+    "creatine", "whey protein", "caffeine", "beta-alanine", "resistance training",
+    "hypertrophy", "endurance training", "vitamin D", "fish oil", "sleep",
+    "high-intensity interval training", "body composition", "fat loss", "recovery",
+]
+OUTCOMES = [
+    "muscle strength", "lean mass", "VO2max", "time to exhaustion", "one-repetition maximum",
+    "muscle protein synthesis", "body fat percentage", "perceived exertion", "power output",
+]
+POPULATIONS = [
+    "trained men", "untrained women", "older adults", "collegiate athletes",
+    "recreationally active adults", "adolescent swimmers", "overweight adults",
+]
+FILLER = [
+    "Participants were randomized in a double-blind, placebo-controlled design.",
+    "Measurements were taken at baseline and after the intervention period.",
+    "Data were analysed with repeated-measures ANOVA and significance was set at p < 0.05.",
+    "Dietary intake was recorded with three-day food diaries.",
+    "Written informed consent was obtained from all participants.",
+    "Blood samples were collected after an overnight fast.",
+]
+
+BODY_PARTS = ["back", "chest", "shoulders", "upper arms", "upper legs", "lower legs", "waist"]
+TARGETS    = ["lats", "upper back", "pectorals", "delts", "biceps", "triceps", "quads", "glutes", "abs"]
+EQUIPMENT  = ["barbell", "dumbbell", "cable", "body weight", "kettlebell", "machine"]
+MOVEMENTS  = ["row", "press", "curl", "squat", "raise", "pulldown", "lunge", "fly", "crunch"]
+
+
+def _abstract_text(rng: random.Random, topic: str) -> tuple[str, list[str], str]:
+    outcome = rng.choice(OUTCOMES)
+    population = rng.choice(POPULATIONS)
+    weeks = rng.choice([4, 6, 8, 10, 12])
+    question = f"Does {topic} improve {outcome} in {population}?"
+    background = (
+        f"BACKGROUND: The effect of {topic} on {outcome} in {population} remains unclear. "
+        + " ".join(rng.sample(FILLER, 2))
+    )
+    methods = (
+        f"METHODS: {rng.randint(12, 90)} {population} completed a {weeks}-week {topic} protocol. "
+        + " ".join(rng.sample(FILLER, 3))
+    )
+    effect = rng.choice(["significantly improved", "did not change", "modestly increased"])
+    results = (
+        f"RESULTS: {topic.capitalize()} {effect} {outcome} compared with placebo "
+        f"({rng.uniform(1, 15):.1f}% difference). " + rng.choice(FILLER)
+    )
+    answer = f"In {population}, {weeks} weeks of {topic} {effect} {outcome}."
+    return question, [background, methods, results], answer
+
+
+def make_abstracts(n: int, seed: int = 0, supplement: bool = False) -> list[dict]:
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        topic = rng.choice(TOPICS)
+        question, contexts, answer = _abstract_text(rng, topic)
+        record = {
+            "pubmed_id": str(10_000_000 + seed * 1_000_000 + i),
+            "question":  question,
+            "contexts":  contexts,
+            "answer":    "" if supplement else answer,
+            "decision":  "" if supplement else rng.choice(["yes", "no", "maybe"]),
+        }
+        if supplement:
+            record["contexts"] = ["\n".join(contexts)]
+            record["supplement"] = topic
+        records.append(record)
+    return records
+
+
+def make_exercises(n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    exercises = []
+    for i in range(n):
+        equipment = rng.choice(EQUIPMENT)
+        target = rng.choice(TARGETS)
+        name = f"{equipment} {target} {rng.choice(MOVEMENTS)} v{i}"
+        exercises.append({
+            "id":               f"{i:04d}",
+            "name":             name,
+            "bodyPart":         rng.choice(BODY_PARTS),
+            "target":           target,
+            "secondaryMuscles": rng.sample(TARGETS, 2),
+            "equipment":        equipment,
+            "difficulty":       rng.choice(["beginner", "intermediate", "advanced"]),
+            "category":         "strength",
+            "description":      f"A {equipment} movement that trains the {target}.",
+            "instructions":     [f"Step {s} of the {name}." for s in range(1, rng.randint(3, 6))],
+        })
+    return exercises
+
+
+def make_questions(n: int, seed: int = 0) -> list[str]:
+    """Single-topic and compound questions in roughly the app's real mix."""
+    rng = random.Random(seed)
+    questions = []
+    for _ in range(n):
+        q = f"Does {rng.choice(TOPICS)} improve {rng.choice(OUTCOMES)}?"
+        if rng.random() < 0.3:
+            q = q.rstrip("?") + f" and what are the best exercises for {rng.choice(TARGETS)}?"
+        questions.append(q)
+    return questions
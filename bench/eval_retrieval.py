@@ -0,0 +1,359 @@
+"""
+Retrieval quality/latency evaluation using the PubMed QA questions as
+ground truth.
+
+Every record in data/fitness_abstracts.json pairs a `question` with its own
+`pubmed_id`, so a sampled question counts as a hit when a chunk from that
+paper comes back in the top k. The corpus is chunked exactly like
+data/embed.py, embedded once (cached under .eval_cache/), and then every
+index configuration is evaluated locally, one per CPU core:
+
+  index type    flat (exact) or ivf (k-means lists, searched with nprobe)
+  quantization  float32, float16 or int8 (per-dimension scale)
+  dimension     full 384 or PCA-reduced
+  top_k         hit@k and MRR@k for each k
+
+    python -m bench.eval_retrieval --questions 1000
+    python -m bench.eval_retrieval --synthetic 3000 --fake-embedder   # smoke run, no downloads
+
+Writes JSON and CSV results and, if matplotlib is installed, a hit@k vs
+p95 latency plot with the Pareto frontier highlighted. Latency is a
+single-query numpy search on one core, so compare configurations with each
+other, not with Pinecone. Every quantization is scored the same way, from a
+float32 copy of its dequantized values (LATENCY_METHOD): quantization changes
+recall and index size, while latency tracks index type, dimension and nprobe.
+"""
+
+import os
+
+# One BLAS thread per worker so parallel configs don't skew each other's latency.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from bench import corpus
+from bench.fakes import FakeEmbedder
+from bench.run import DATA_DIR, ROOT_DIR, import_ingestion, percentiles
+
+CACHE_DIR       = os.path.join(ROOT_DIR, ".eval_cache")
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+INPUT_FILE      = os.path.join(DATA_DIR, "fitness_abstracts.json")
+
+INDEX_TYPES   = ["flat", "ivf"]
+QUANTIZATIONS = ["float32", "float16", "int8"]
+DIMENSIONS    = [384, 256, 128]
+TOP_KS        = [5, 10, 20]
+NPROBES       = [1, 4, 16]
+KMEANS_ITERS  = 15
+LATENCY_METHOD = "float32 matmul over the dequantized stored vectors, the same for every quantization"
+
+# Populated in each worker by _init_worker().
+_corpus = None
+_queries = None
+_labels = None
+_chunk_labels = None
+
+
+def load_records(args) -> list[dict]:
+    if args.synthetic:
+        return corpus.make_abstracts(args.synthetic, seed=args.seed)
+    with open(args.input) as f:
+        return json.load(f)
+
+
+def chunk_records(records: list[dict]) -> tuple[list[str], list[str]]:
+    """Chunk and de-duplicate like data/embed.py, without importing its chromadb dependency."""
+    chunking = import_ingestion("chunking")
+    chunks, labels, seen_hashes = [], [], set()
+    for item in records:
+        for chunk in chunking.split_text(chunking.abstract_text(item)):
+            h = chunking.get_hash(chunk)
+            if h in seen_hashes:
+                continue
+            seen_hashes.add(h)
+            chunks.append(chunk)
+            labels.append(item["pubmed_id"])
+    return chunks, labels
+
+
+def embed_cached(texts: list[str], embedder, tag: str) -> np.ndarray:
+    digest = hashlib.sha256("\x00".join(texts).encode()).hexdigest()[:16]
+    path = os.path.join(CACHE_DIR, f"{tag}_{digest}.npy")
+    if os.path.exists(path):
+        return np.load(path)
+    vectors = np.asarray(
+        embedder.encode(texts, batch_size=256, show_progress_bar=len(texts) > 1000,
+                        normalize_embeddings=True),
+        dtype=np.float32,
+    )
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    np.save(path, vectors)
+    return vectors
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.where(norms == 0, 1, norms)
+
+
+def reduce_dim(corpus_vecs: np.ndarray, query_vecs: np.ndarray, dim: int):
+    if dim >= corpus_vecs.shape[1]:
+        return corpus_vecs, query_vecs
+    mean = corpus_vecs.mean(axis=0)
+    # PCA via SVD of a sample; MiniLM is not trained for prefix truncation.
+    sample = corpus_vecs[np.random.default_rng(0).choice(len(corpus_vecs), min(len(corpus_vecs), 20000), replace=False)]
+    _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+    basis = vt[:dim].T.astype(np.float32)
+    return _normalize((corpus_vecs - mean) @ basis), _normalize((query_vecs - mean) @ basis)
+
+
+class Quantized:
+    """Stores vectors at reduced precision and scores queries against them."""
+
+    def __init__(self, vectors: np.ndarray, quantization: str):
+        self.quantization = quantization
+        if quantization == "int8":
+            self.scale = np.abs(vectors).max(axis=0) / 127
+            self.scale[self.scale == 0] = 1
+            self.data = np.round(vectors / self.scale).astype(np.int8)
+        else:
+            self.scale = None
+            self.data = vectors.astype(quantization)
+        # numpy's float16 and int8 matmuls are far slower than a SIMD index's
+        # (int8 upcasts the whole matrix per query), so every dtype is scored
+        # from a float32 copy of its dequantized values, made once here. Recall
+        # reflects the stored precision and nbytes the stored size.
+        if self.scale is not None:
+            self._scoring = self.data.astype(np.float32) * self.scale.astype(np.float32)
+        else:
+            self._scoring = self.data.astype(np.float32, copy=False)
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + (self.scale.nbytes if self.scale is not None else 0)
+
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        data = self._scoring if rows is None else self._scoring[rows]
+        return data @ query.astype(np.float32, copy=False)
+
+
+def kmeans(vectors: np.ndarray, k: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(KMEANS_ITERS):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(k):
+            members = vectors[assign == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids = _normalize(centroids)
+    return centroids
+
+
+class Index:
+    def __init__(self, vectors: np.ndarray, index_type: str, quantization: str, nlist: int, seed: int):
+        self.index_type = index_type
+        self.store = Quantized(vectors, quantization)
+        self.lists = None
+        if index_type == "ivf":
+            self.centroids = kmeans(vectors, nlist, seed)
+            assign = np.argmax(vectors @ self.centroids.T, axis=1)
+            self.lists = [np.flatnonzero(assign == c) for c in range(nlist)]
+
+    def search(self, query: np.ndarray, k: int, nprobe: int = 1) -> np.ndarray:
+        if self.lists is None:
+            scores = self.store.scores(query)
+            rows = None
+        else:
+            probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            rows = np.concatenate([self.lists[c] for c in probe])
+            scores = self.store.scores(query, rows)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top if rows is None else rows[top]
+
+
+def _init_worker(corpus_path: str, query_path: str, labels: list[str], chunk_labels: list[str]):
+    global _corpus, _queries, _labels, _chunk_labels
+    _corpus = np.load(corpus_path, mmap_mode="r")
+    _queries = np.load(query_path)
+    _labels = labels
+    _chunk_labels = np.asarray(chunk_labels)
+
+
+def evaluate(config: dict) -> list[dict]:
+    corpus_vecs, query_vecs = reduce_dim(np.asarray(_corpus), _queries, config["dim"])
+
+    t0 = time.perf_counter()
+    index = Index(corpus_vecs, config["index_type"], config["quantization"], config["nlist"], config["seed"])
+    build_s = time.perf_counter() - t0
+
+    max_k = max(config["top_ks"])
+    latencies, ranks = [], []
+    for query, label in zip(query_vecs, _labels):
+        t0 = time.perf_counter()
+        top = index.search(query, max_k, config.get("nprobe", 1))
+        latencies.append(time.perf_counter() - t0)
+        hits = np.flatnonzero(_chunk_labels[top] == label)
+        ranks.append(int(hits[0]) + 1 if len(hits) else None)
+
+    lat = percentiles(latencies)
+    rows = []
+    for k in config["top_ks"]:
+        rows.append({
+            "index_type":   config["index_type"],
+            "nprobe":       config.get("nprobe", ""),
+            "quantization": config["quantization"],
+            "dim":          config["dim"],
+            "top_k":        k,
+            "hit_at_k":     sum(1 for r in ranks if r is not None and r <= k) / len(ranks),
+            "mrr_at_k":     sum(1 / r for r in ranks if r is not None and r <= k) / len(ranks),
+            "p50_ms":       lat["p50_ms"],
+            "p95_ms":       lat["p95_ms"],
+            "build_s":      build_s,
+            "index_mb":     index.store.nbytes / 2**20,
+        })
+    return rows
+
+
+def pareto_frontier(rows: list[dict]) -> list[dict]:
+    """Configs not beaten on both hit@k and p95 latency by another config with the same k."""
+    frontier = []
+    for r in rows:
+        dominated = any(
+            o is not r and o["top_k"] == r["top_k"]
+            and o["hit_at_k"] >= r["hit_at_k"] and o["p95_ms"] <= r["p95_ms"]
+            and (o["hit_at_k"] > r["hit_at_k"] or o["p95_ms"] < r["p95_ms"])
+            for o in rows
+        )
+        if not dominated:
+            frontier.append(r)
+    return frontier
+
+
+def plot(rows: list[dict], frontier: list[dict], path: str):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("  matplotlib not installed; skipping plot")
+        return
+
+    top_ks = sorted({r["top_k"] for r in rows})
+    fig, axes = plt.subplots(1, len(top_ks), figsize=(5 * len(top_ks), 4), sharey=True)
+    for ax, k in zip(np.atleast_1d(axes), top_ks):
+        points = [r for r in rows if r["top_k"] == k]
+        front = sorted((r for r in frontier if r["top_k"] == k), key=lambda r: r["p95_ms"])
+        ax.scatter([r["p95_ms"] for r in points], [r["hit_at_k"] for r in points], s=12, alpha=0.5)
+        ax.plot([r["p95_ms"] for r in front], [r["hit_at_k"] for r in front], "r-o", markersize=4)
+        for r in front:
+            label = f"{r['index_type']}{r['nprobe'] or ''}/{r['quantization']}/{r['dim']}"
+            ax.annotate(label, (r["p95_ms"], r["hit_at_k"]), fontsize=6)
+        ax.set_title(f"top_k = {k}")
+        ax.set_xlabel("p95 search latency (ms, float32 scoring for every quantization)")
+        ax.set_xscale("log")
+    np.atleast_1d(axes)[0].set_ylabel("hit@k")
+    fig.tight_layout()
+    fig.savefig(path, dpi=150)
+    print(f"  Plot saved to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=INPUT_FILE)
+    parser.add_argument("--synthetic", type=int, default=0, help="use N synthetic abstracts instead of --input")
+    parser.add_argument("--questions", type=int, default=1000)
+    parser.add_argument("--fake-embedder", action="store_true", help="hashing embedder instead of all-MiniLM-L6-v2")
+    parser.add_argument("--dims", default=",".join(map(str, DIMENSIONS)))
+    parser.add_argument("--top-ks", default=",".join(map(str, TOP_KS)))
+    parser.add_argument("--nprobes", default=",".join(map(str, NPROBES)))
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="eval_retrieval")
+    args = parser.parse_args()
+
+    records = load_records(args)
+    print(f"Loaded {len(records)} abstracts")
+    chunks, chunk_labels = chunk_records(records)
+    print(f"  {len(chunks)} chunks")
+
+    sample = random.Random(args.seed).sample(records, min(args.questions, len(records)))
+    questions = [r["question"] for r in sample]
+    labels = [r["pubmed_id"] for r in sample]
+
+    if args.fake_embedder:
+        embedder, tag = FakeEmbedder(), "fake"
+    else:
+        from sentence_transformers import SentenceTransformer
+        embedder, tag = SentenceTransformer(EMBEDDING_MODEL), EMBEDDING_MODEL
+
+    print("Embedding corpus and questions (cached after the first run)...")
+    corpus_vecs = embed_cached(chunks, embedder, f"{tag}_corpus")
+    query_vecs = embed_cached(questions, embedder, f"{tag}_queries")
+
+    # Workers memory-map the corpus instead of receiving it pickled.
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    corpus_path = os.path.join(CACHE_DIR, "eval_corpus.npy")
+    query_path = os.path.join(CACHE_DIR, "eval_queries.npy")
+    np.save(corpus_path, corpus_vecs)
+    np.save(query_path, query_vecs)
+
+    top_ks = [int(k) for k in args.top_ks.split(",")]
+    nlist = max(1, int(np.sqrt(len(chunks))))
+    configs = []
+    for index_type, quantization, dim in itertools.product(
+        INDEX_TYPES, QUANTIZATIONS, [int(d) for d in args.dims.split(",")]
+    ):
+        base = {"index_type": index_type, "quantization": quantization, "dim": dim,
+                "top_ks": top_ks, "nlist": nlist, "seed": args.seed}
+        if index_type == "ivf":
+            configs += [{**base, "nprobe": p} for p in (int(n) for n in args.nprobes.split(",")) if p <= nlist]
+        else:
+            configs.append(base)
+
+    print(f"Evaluating {len(configs)} configurations on {args.workers} worker(s)...")
+    rows = []
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(corpus_path, query_path, labels, chunk_labels),
+    ) as pool:
+        for result in pool.map(evaluate, configs):
+            rows.extend(result)
+
+    frontier = pareto_frontier(rows)
+    print(f"Latency: {LATENCY_METHOD}")
+    for r in sorted(frontier, key=lambda r: (r["top_k"], r["p95_ms"])):
+        print(
+            f"  k={r['top_k']:<3} {r['index_type']:<4} nprobe={r['nprobe'] or '-':<3} "
+            f"{r['quantization']:<8} dim={r['dim']:<4} hit@k={r['hit_at_k']:.3f} "
+            f"MRR={r['mrr_at_k']:.3f} p95={r['p95_ms']:.2f} ms"
+        )
+
+    with open(f"{args.out}.json", "w") as f:
+        json.dump({"config": vars(args), "latency_method": LATENCY_METHOD, "chunks": len(chunks),
+                   "results": rows, "frontier": frontier}, f, indent=2)
+    with open(f"{args.out}.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Saved {args.out}.json and {args.out}.csv")
+    plot(rows, frontier, f"{args.out}.png")
+
+
+if __name__ == "__main__":
+    main()
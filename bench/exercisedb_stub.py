@@ -0,0 +1,92 @@
+"""
+Local stand-in for the ExerciseDB API, for running data/fetch_exercises.py
+without a RapidAPI key or quota.
+
+    python -m bench.exercisedb_stub --exercises 1300 --port 8765
+    EXERCISEDB_URL=http://127.0.0.1:8765 python data/fetch_exercises.py
+
+Serves synthetic exercises from bench.corpus on /exercises,
+/exercises/bodyPart/<part> and /exercises/target/<muscle> with limit/offset
+paging, ETag and Last-Modified headers, and 304 replies to conditional
+requests. GET /stats returns the request counts by status.
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+from bench import corpus
+
+
+def make_handler(exercises: list[dict]):
+    last_modified = formatdate(usegmt=True)
+    counts = Counter()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/stats":
+                with lock:
+                    return self._send(200, json.dumps(dict(counts)).encode())
+
+            parts = [unquote(p) for p in url.path.strip("/").split("/")]
+            if parts == ["exercises"]:
+                selected = exercises
+            elif len(parts) == 3 and parts[0] == "exercises" and parts[1] in ("bodyPart", "target"):
+                selected = [ex for ex in exercises if ex[parts[1]] == parts[2]]
+            else:
+                return self._reply(404, b'{"message": "not found"}')
+
+            query = parse_qs(url.query)
+            limit = int(query.get("limit", ["10"])[0])
+            offset = int(query.get("offset", ["0"])[0])
+            body = json.dumps(selected[offset:offset + limit]).encode()
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            headers = {"ETag": etag, "Last-Modified": last_modified}
+            if self.headers.get("If-None-Match") == etag:
+                return self._reply(304, b"", headers)
+            self._reply(200, body, headers)
+
+        def _reply(self, status: int, body: bytes, headers: Optional[dict] = None):
+            with lock:
+                counts[str(status)] += 1
+            self._send(status, body, headers)
+
+        def _send(self, status: int, body: bytes, headers: Optional[dict] = None):
+            self.send_response(status)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            if status != 304:
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if status != 304:
+                self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exercises", type=int, default=1300)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(corpus.make_exercises(args.exercises, seed=args.seed)))
+    print(f"ExerciseDB stub with {args.exercises} exercises on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
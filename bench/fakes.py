@@ -0,0 +1,231 @@
+"""
+Deterministic stand-ins for the external services used by the app and the
+ingestion scripts: an in-memory Pinecone index, a ChromaDB collection, a
+Groq client with configurable latency and token stream, and a hashing
+embedder that mimics SentenceTransformer.encode().
+"""
+
+import hashlib
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+import numpy as np
+
+EMBEDDING_DIM = 384
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class FakeEmbedder:
+    """Feature-hashing bag of words, L2-normalised, so similar texts score higher."""
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def _embed(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in _TOKEN_RE.findall(text.lower()):
+            h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False,
+               normalize_embeddings: bool = False, **kwargs):
+        if isinstance(sentences, str):
+            return self._embed(sentences)
+        if not sentences:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([self._embed(s) for s in sentences])
+
+
+class FakeIndex:
+    """In-memory, brute-force cosine index with the subset of the Pinecone API the repo uses."""
+
+    def __init__(self, dim: int = EMBEDDING_DIM, query_latency: float = 0.0):
+        self.dim = dim
+        self.query_latency = query_latency
+        self._lock = threading.Lock()
+        self._namespaces = {}   # namespace -> {"ids": [], "vectors": ndarray, "metadata": [], "pos": {}}
+
+    def _ns(self, namespace: str) -> dict:
+        return self._namespaces.setdefault(
+            namespace,
+            {"ids": [], "vectors": np.zeros((0, self.dim), dtype=np.float32), "metadata": [], "pos": {}},
+        )
+
+    def upsert(self, vectors: list, namespace: str = ""):
+        with self._lock:
+            ns = self._ns(namespace)
+            stored = len(ns["vectors"])
+            new_rows = []
+            for v in vectors:
+                if isinstance(v, dict):
+                    id_, values, meta = v["id"], v["values"], v.get("metadata", {})
+                else:
+                    id_, values, meta = v[0], v[1], v[2] if len(v) > 2 else {}
+                values = np.asarray(values, dtype=np.float32)
+                norm = np.linalg.norm(values)
+                values = values / norm if norm else values
+                pos = ns["pos"].get(id_)
+                if pos is None:
+                    pos = ns["pos"][id_] = len(ns["ids"])
+                    ns["ids"].append(id_)
+                    ns["metadata"].append(meta)
+                    new_rows.append(values)
+                else:
+                    ns["metadata"][pos] = meta
+                    if pos < stored:
+                        ns["vectors"][pos] = values
+                    else:
+                        new_rows[pos - stored] = values
+            if new_rows:
+                ns["vectors"] = np.vstack([ns["vectors"], np.stack(new_rows)])
+        return SimpleNamespace(upserted_count=len(vectors))
+
+    def query(self, vector, top_k: int = 10, include_metadata: bool = False,
+              namespace: str = "", **kwargs):
+        if self.query_latency:
+            time.sleep(self.query_latency)
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None or not ns["ids"]:
+                return SimpleNamespace(matches=[], namespace=namespace)
+            scores = ns["vectors"] @ np.asarray(vector, dtype=np.float32)
+            k = min(top_k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            matches = [
+                SimpleNamespace(
+                    id=ns["ids"][i],
+                    score=float(scores[i]),
+                    metadata=ns["metadata"][i] if include_metadata else None,
+                )
+                for i in top
+            ]
+        return SimpleNamespace(matches=matches, namespace=namespace)
+
+    def fetch(self, ids: list[str], namespace: str = ""):
+        with self._lock:
+            ns = self._namespaces.get(namespace, {"pos": {}})
+            vectors = {
+                id_: SimpleNamespace(id=id_, values=ns["vectors"][ns["pos"][id_]].tolist(),
+                                     metadata=ns["metadata"][ns["pos"][id_]])
+                for id_ in ids if id_ in ns["pos"]
+            }
+        return SimpleNamespace(vectors=vectors, namespace=namespace)
+
+    def delete(self, ids: Optional[list[str]] = None, delete_all: bool = False, namespace: str = ""):
+        with self._lock:
+            if delete_all:
+                self._namespaces.pop(namespace, None)
+                return
+            ns = self._namespaces.get(namespace)
+            if ns is None:
+                return
+            doomed = set(ids or [])
+            keep = [i for i, id_ in enumerate(ns["ids"]) if id_ not in doomed]
+            ns["ids"] = [ns["ids"][i] for i in keep]
+            ns["metadata"] = [ns["metadata"][i] for i in keep]
+            ns["vectors"] = ns["vectors"][keep]
+            ns["pos"] = {id_: i for i, id_ in enumerate(ns["ids"])}
+
+    def describe_index_stats(self):
+        with self._lock:
+            namespaces = {
+                name: SimpleNamespace(vector_count=len(ns["ids"]))
+                for name, ns in self._namespaces.items()
+            }
+        return SimpleNamespace(
+            dimension=self.dim,
+            namespaces=namespaces,
+            total_vector_count=sum(ns.vector_count for ns in namespaces.values()),
+        )
+
+
+class FakeCollection:
+    """The slice of chromadb's Collection API used by the ingestion scripts."""
+
+    def __init__(self):
+        self._ids = []
+        self._rows = {}
+
+    def add(self, documents: list, embeddings: list, metadatas: list, ids: list):
+        for id_, doc, emb, meta in zip(ids, documents, embeddings, metadatas):
+            if id_ not in self._rows:
+                self._ids.append(id_)
+            self._rows[id_] = (doc, list(emb), meta)
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def get(self, ids: Optional[list] = None, include: Optional[list] = None):
+        include = include or []
+        ids = self._ids if ids is None else [i for i in ids if i in self._rows]
+        result = {"ids": list(ids)}
+        for field, pos in (("documents", 0), ("embeddings", 1), ("metadatas", 2)):
+            if field in include:
+                result[field] = [self._rows[i][pos] for i in ids]
+        return result
+
+
+class _FakeCompletions:
+    def __init__(self, owner: "FakeGroq"):
+        self._owner = owner
+
+    def create(self, model: str, messages: list, temperature: float = 0, max_tokens: int = 256,
+               stream: bool = False, timeout: Optional[float] = None, **kwargs):
+        owner = self._owner
+        n_tokens = min(max_tokens, owner.completion_tokens)
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        with owner._lock:
+            owner.calls += 1
+            owner.prompt_tokens_total += prompt_tokens
+        words = [owner.word] * n_tokens
+
+        if stream:
+            return self._stream(model, words)
+
+        time.sleep(owner.first_token_latency + n_tokens * owner.per_token_latency)
+        return SimpleNamespace(
+            id="fake-completion",
+            model=model,
+            choices=[SimpleNamespace(
+                index=0,
+                finish_reason="stop",
+                message=SimpleNamespace(role="assistant", content=" ".join(words)),
+            )],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=n_tokens,
+                total_tokens=prompt_tokens + n_tokens,
+            ),
+        )
+
+    def _stream(self, model: str, words: list[str]):
+        owner = self._owner
+        time.sleep(owner.first_token_latency)
+        for word in words:
+            time.sleep(owner.per_token_latency)
+            yield SimpleNamespace(
+                model=model,
+                choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=word + " "), finish_reason=None)],
+            )
+
+
+class FakeGroq:
+    """Groq client stub: sleeps first_token_latency + per_token_latency * tokens, then answers."""
+
+    def __init__(self, first_token_latency: float = 0.2, per_token_latency: float = 0.002,
+                 completion_tokens: int = 200, word: str = "gains"):
+        self.first_token_latency = first_token_latency
+        self.per_token_latency = per_token_latency
+        self.completion_tokens = completion_tokens
+        self.word = word
+        self.calls = 0
+        self.prompt_tokens_total = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self))
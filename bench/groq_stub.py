@@ -0,0 +1,172 @@
+"""
+Local OpenAI-compatible stand-in for the Groq API, for exercising
+llm_gateway's retries, Retry-After handling, hedging and model fallback.
+
+    python -m bench.groq_stub --port 8766 --latency 0.3 --fail-rate 0.2 --fail-status 429
+    GROQ_BASE_URL=http://127.0.0.1:8766 GROQ_API_KEY=stub streamlit run app.py
+
+Serves POST /openai/v1/chat/completions. Each request first takes the next
+status from --statuses (e.g. "429,429,503"), then fails with --fail-status
+at --fail-rate, and otherwise answers after --latency seconds (or --stall
+seconds at --stall-rate). Models listed in --healthy-models never fail or
+stall, so the fallback model can be kept healthy while the primary is
+saturated. GET /stats returns request counts by model and status.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128   # the default of 5 drops bursts of concurrent connects
+
+
+class GroqStub:
+    def __init__(self, latency: float = 0.2, fail_rate: float = 0.0, fail_status: int = 429,
+                 retry_after: Optional[float] = None, stall_rate: float = 0.0, stall: float = 10.0,
+                 statuses: Optional[list[int]] = None, healthy_models: Optional[set[str]] = None,
+                 completion_tokens: int = 64, seed: int = 0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.statuses = list(statuses or [])
+        self.healthy_models = healthy_models or set()
+        self.completion_tokens = completion_tokens
+        self.counts = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _plan(self, model: str) -> tuple[int, float]:
+        """Pick the status and delay for one request."""
+        with self._lock:
+            if model in self.healthy_models:
+                return 200, self.latency
+            if self.statuses:
+                status = self.statuses.pop(0)
+                return status, 0.0 if status != 200 else self.latency
+            if self._rng.random() < self.fail_rate:
+                return self.fail_status, 0.0
+            if self._rng.random() < self.stall_rate:
+                return 200, self.stall
+            return 200, self.latency
+
+    def _record(self, model: str, status: int):
+        with self._lock:
+            self.counts[f"{model} {status}"] += 1
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/stats":
+                    return self._json(404, {"error": {"message": "not found"}})
+                with stub._lock:
+                    self._json(200, dict(stub.counts))
+
+            def do_POST(self):
+                if self.path != COMPLETIONS_PATH:
+                    return self._json(404, {"error": {"message": "not found"}})
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                model = body.get("model", "")
+                status, delay = stub._plan(model)
+                stub._record(model, status)
+                if status != 200:
+                    headers = {"Retry-After": str(stub.retry_after)} if stub.retry_after is not None else {}
+                    return self._json(status, {"error": {"message": f"stub {status}", "type": "stub"}}, headers)
+
+                time.sleep(delay)
+                prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+                completion_tokens = min(stub.completion_tokens, body.get("max_tokens") or stub.completion_tokens)
+                self._json(200, {
+                    "id":      f"stub-{time.monotonic_ns()}",
+                    "object":  "chat.completion",
+                    "created": int(time.time()),
+                    "model":   model,
+                    "choices": [{
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": " ".join(["gains"] * completion_tokens)},
+                    }],
+                    "usage": {
+                        "prompt_tokens":     prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens":      prompt_tokens + completion_tokens,
+                    },
+                })
+
+            def _json(self, status: int, payload: dict, headers: Optional[dict] = None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self, port: int = 0) -> str:
+        """Serve in a background thread and return the base URL for GROQ_BASE_URL."""
+        self._server = _Server(("127.0.0.1", port), self.handler())
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before a normal answer")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--fail-status", type=int, default=429)
+    parser.add_argument("--retry-after", type=float, help="Retry-After header on failures (s)")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="share of answers delayed by --stall")
+    parser.add_argument("--stall", type=float, default=10.0)
+    parser.add_argument("--statuses", default="", help="comma-separated statuses for the first requests")
+    parser.add_argument("--healthy-models", default="", help="comma-separated models that never fail")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stub = GroqStub(
+        latency=args.latency,
+        fail_rate=args.fail_rate,
+        fail_status=args.fail_status,
+        retry_after=args.retry_after,
+        stall_rate=args.stall_rate,
+        stall=args.stall,
+        statuses=[int(s) for s in args.statuses.split(",") if s],
+        healthy_models={m for m in args.healthy_models.split(",") if m},
+        seed=args.seed,
+    )
+    url = stub.start(args.port)
+    print(f"Groq stub on {url} (set GROQ_BASE_URL={url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
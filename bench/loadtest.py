@@ -0,0 +1,239 @@
+"""
+Concurrent-user load test for the Streamlit app.
+
+    python -m bench.loadtest --ramp 1,4,8,16 --actions 5 --out loadtest.json
+
+Each simulated user is its own Streamlit session driving the real app.py
+through streamlit.testing.v1.AppTest: it asks questions and, with
+probability --gymbro-rate, clicks Gym Bro Mode. Pinecone and Groq are
+replaced with the local fakes from bench.fakes, so the test measures how
+one worker process copes (embedder, GIL, LLM client, admission control)
+rather than the remote services. For each ramp stage the report gives
+throughput, latency percentiles per action and memory per session.
+
+AppTest assumes one test at a time: every run installs, then clears, a
+process-wide mock Runtime, patches global config and compiles the script
+into a fresh cache. shared_test_runtime() pins one mock Runtime, the config
+and a shared script cache for the whole load test so sessions can run
+concurrently in threads, like real sessions in one server.
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import random
+import resource
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from bench import corpus
+from bench.fakes import FakeGroq
+from bench.run import ROOT_DIR, build_index, install_fakes, make_embedder, percentiles
+
+APP_PATH = os.path.join(ROOT_DIR, "app.py")
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # ru_maxrss is a peak, in KB on Linux and bytes on macOS; good enough as a fallback.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@contextlib.contextmanager
+def shared_test_runtime():
+    from unittest.mock import MagicMock
+
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+    from streamlit.testing.v1.util import patch_config_options
+
+    shared = MagicMock(spec=Runtime)
+    shared.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared.dataframe_source_mgr = DataframeSourceManager()
+    shared.cache_storage_manager = MemoryCacheStorageManager()
+
+    script_cache = ScriptCache()   # compile app.py once, as the server does
+
+    saved = (
+        Runtime.__dict__["instance"],
+        Runtime.__dict__["exists"],
+        app_test.patch_config_options,
+        app_test.ScriptCache,
+        local_script_runner.ScriptCache,
+    )
+    Runtime.instance = classmethod(lambda cls: shared)
+    Runtime.exists = classmethod(lambda cls: True)
+    app_test.patch_config_options = lambda options: contextlib.nullcontext()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        (Runtime.instance, Runtime.exists, app_test.patch_config_options,
+         app_test.ScriptCache, local_script_runner.ScriptCache) = saved
+
+
+def simulate_user(user_id: int, args, questions: list[str], sessions: list, timings: dict, lock, ready):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(args.seed * 1000 + user_id)
+    try:
+        at = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+        at.run()
+        if not at.text_input:
+            raise RuntimeError(f"user {user_id}: app did not render: {[e.value for e in at.exception]}")
+    except BaseException:
+        ready.abort()   # release the other sessions and run_stage instead of leaving them waiting
+        raise
+    with lock:
+        sessions.append(at)   # keep the session alive so its memory is measured
+    ready.wait()   # every session is connected before the load starts
+
+    for _ in range(args.actions):
+        t0 = time.perf_counter()
+        at.text_input[0].input(rng.choice(questions)).run()
+        ask_s = time.perf_counter() - t0
+        failed = bool(at.exception) or bool(at.error)
+
+        bro_s = None
+        if not failed and rng.random() < args.gymbro_rate and at.button:
+            t0 = time.perf_counter()
+            at.button[0].click().run()
+            bro_s = time.perf_counter() - t0
+            failed = bool(at.exception) or bool(at.error)
+
+        with lock:
+            timings["ask"].append(ask_s)
+            if bro_s is not None:
+                timings["gymbro"].append(bro_s)
+            timings["errors"] += failed
+            timings["rejected"] += bool(at.warning)
+        if args.think_time:
+            time.sleep(rng.uniform(0, 2 * args.think_time))
+
+
+def run_stage(users: int, args, questions: list[str]) -> dict:
+    lock = threading.Lock()
+    sessions = []
+    timings = {"ask": [], "gymbro": [], "errors": 0, "rejected": 0}
+
+    ready = threading.Barrier(users + 1)
+
+    gc.collect()
+    rss_before = rss_mb()
+    tracemalloc.start()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        futures = [
+            pool.submit(simulate_user, i, args, questions, sessions, timings, lock, ready)
+            for i in range(users)
+        ]
+        try:
+            ready.wait()
+        except threading.BrokenBarrierError:
+            # A session failed to start; raise its error rather than the broken barrier.
+            for f in futures:
+                error = f.exception()
+                if error is not None and not isinstance(error, threading.BrokenBarrierError):
+                    raise error
+            raise
+        start = time.perf_counter()
+        for f in futures:
+            f.result()
+    elapsed = time.perf_counter() - start
+    traced, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = rss_mb()
+
+    actions = len(timings["ask"]) + len(timings["gymbro"])
+    result = {
+        "users":             users,
+        "elapsed_s":         elapsed,
+        "actions":           actions,
+        "actions_per_s":     actions / elapsed,
+        "questions_per_s":   len(timings["ask"]) / elapsed,
+        "ask":               percentiles(timings["ask"]),
+        "gymbro":            percentiles(timings["gymbro"]),
+        "errors":            timings["errors"],
+        "rejected":          timings["rejected"],
+        "rss_mb":            rss_after,
+        "rss_delta_per_session_mb":  (rss_after - rss_before) / users,
+        "traced_per_session_kb":     traced / users / 1024,
+        "traced_peak_per_session_kb": traced_peak / users / 1024,
+    }
+    sessions.clear()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ramp", default="1,2,4,8,16", help="comma-separated concurrent users per stage")
+    parser.add_argument("--actions", type=int, default=5, help="questions asked by each user per stage")
+    parser.add_argument("--gymbro-rate", type=float, default=0.4, help="chance a user clicks Gym Bro Mode")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between actions (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--token-latency", type=float, default=0.002)
+    parser.add_argument("--index-latency", type=float, default=0.03)
+    parser.add_argument("--corpus-size", type=int, default=5000)
+    parser.add_argument("--real-embedder", action="store_true")
+    parser.add_argument("--real-budget", action="store_true", help="keep the configured Groq TPM/RPM admission limits")
+    parser.add_argument("--timeout", type=float, default=120, help="per-rerun AppTest timeout (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="loadtest_results.json")
+    args = parser.parse_args()
+
+    os.environ.setdefault("GROQ_API_KEY", "loadtest")
+    os.environ.setdefault("PINECONE_API_KEY", "loadtest")
+
+    import admission
+    configured_controller = admission.controller
+
+    embedder = make_embedder(args.real_embedder)
+    index = build_index(
+        embedder,
+        corpus.make_abstracts(args.corpus_size, seed=args.seed),
+        corpus.make_exercises(200, seed=args.seed),
+    )
+    index.query_latency = args.index_latency
+    llm = FakeGroq(first_token_latency=args.llm_latency, per_token_latency=args.token_latency)
+    install_fakes(embedder, index, llm)
+    if args.real_budget:
+        admission.controller = configured_controller
+
+    # Many distinct questions so the load is not served from the Gym Bro cache.
+    questions = corpus.make_questions(500, seed=args.seed)
+    stages = []
+    with shared_test_runtime():
+        for users in (int(u) for u in args.ramp.split(",")):
+            print(f"Stage: {users} concurrent user(s)...")
+            stage = run_stage(users, args, questions)
+            stages.append(stage)
+            ask = stage["ask"]
+            print(
+                f"  {stage['questions_per_s']:.2f} q/s · ask p50 {ask['p50_ms']:.0f} ms "
+                f"p95 {ask['p95_ms']:.0f} ms p99 {ask['p99_ms']:.0f} ms · "
+                f"{stage['traced_per_session_kb']:.0f} KB/session · errors {stage['errors']}"
+            )
+
+    results = {
+        "meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "config": vars(args)},
+        "stages": stages,
+    }
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Offline benchmark for the query path and the ingestion scripts.
+
+    python -m bench.run --out bench_results.json
+    python -m bench.run --questions 200 --llm-latency 0.5 --real-embedder
+    python -m bench.run --groq-stub --llm-fail-rate 0.2 --llm-stall-rate 0.05
+
+The query path runs the real rag.answer_question() against FakeIndex and
+FakeGroq. With --groq-stub the real Groq client talks HTTP to bench.groq_stub
+instead, so llm_gateway's retries, Retry-After handling, hedging and model
+fallback are exercised too. The ingestion benchmarks run the real build_chunks() and
+upload_collection() functions from data/ on synthetic corpora. Results are
+written as JSON for bench.compare.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from bench import corpus
+from bench.fakes import FakeCollection, FakeEmbedder, FakeGroq, FakeIndex
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT_DIR, "data")
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "count":   len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms":  pick(0.50) * 1000,
+        "p95_ms":  pick(0.95) * 1000,
+        "p99_ms":  pick(0.99) * 1000,
+    }
+
+
+def make_embedder(real: bool):
+    if real:
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer("all-MiniLM-L6-v2")
+    return FakeEmbedder()
+
+
+def install_fakes(embedder, index, llm):
+    """Point rag and the LLM gateway at local fakes with an unlimited Groq budget."""
+    import admission
+    import llm_gateway
+    import rag
+    import tracing
+
+    rag._embedder = embedder
+    rag._pinecone_index = index
+    llm_gateway._client = llm
+    admission.controller = admission.AdmissionController(10**12, 10**12, 10**6, 60)
+    tracing.TRACING_ENABLED = True
+
+
+def build_index(embedder, abstracts: list[dict], exercises: list[dict]) -> FakeIndex:
+    index = FakeIndex()
+    texts, vectors = [], []
+    for item in abstracts:
+        text = "\n\n".join(item["contexts"])[:400]
+        texts.append(text)
+        vectors.append({
+            "id": f"chunk_{item['pubmed_id']}",
+            "metadata": {"text": text, "pubmed_id": item["pubmed_id"], "question": item["question"]},
+        })
+    for ex in exercises:
+        text = f"Exercise: {ex['name'].title()} targets {ex['target']}"
+        texts.append(text)
+        vectors.append({
+            "id": f"exercise_{ex['id']}",
+            "metadata": {"text": text, "source": "exercisedb", "name": ex["name"], "pubmed_id": ""},
+        })
+    for vec, emb in zip(vectors, embedder.encode(texts, batch_size=256)):
+        vec["values"] = emb.tolist()
+    index.upsert(vectors)
+    return index
+
+
+def bench_query_path(args, embedder) -> dict:
+    import rag
+    import tracing
+
+    abstracts = corpus.make_abstracts(args.corpus_size, seed=args.seed)
+    exercises = corpus.make_exercises(200, seed=args.seed)
+    index = build_index(embedder, abstracts, exercises)
+    index.query_latency = args.index_latency
+    if args.groq_stub:
+        from bench.groq_stub import GroqStub
+        stub = GroqStub(
+            latency=args.llm_latency,
+            fail_rate=args.llm_fail_rate,
+            retry_after=0,
+            stall_rate=args.llm_stall_rate,
+            stall=args.llm_latency * 10,
+            healthy_models={os.getenv("GYMIQ_FALLBACK_MODEL", "llama-3.1-8b-instant")},
+            seed=args.seed,
+        )
+        os.environ["GROQ_BASE_URL"] = stub.start()
+        os.environ.setdefault("GROQ_API_KEY", "stub")
+        llm = None   # llm_gateway builds its real client against the stub
+    else:
+        llm = FakeGroq(first_token_latency=args.llm_latency, per_token_latency=args.token_latency)
+    install_fakes(embedder, index, llm)
+
+    questions = corpus.make_questions(args.questions, seed=args.seed)
+    rag.answer_question(questions[0])   # warm-up: model load, pools
+    with tracing._lock:
+        tracing._samples.clear()
+        tracing._totals.clear()
+        tracing._counters.clear()
+
+    latencies = []
+    start = time.perf_counter()
+    for q in questions:
+        t0 = time.perf_counter()
+        rag.answer_question(q)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    snap = tracing.snapshot()
+    results = {
+        "questions":       len(questions),
+        "questions_per_s": len(questions) / elapsed,
+        "end_to_end":      percentiles(latencies),
+        "stages":          snap["stages"],
+        "counters":        snap["counters"],
+    }
+    if args.groq_stub:
+        results["llm_requests"] = dict(stub.counts)
+        stub.stop()
+    return results
+
+
+def import_ingestion(name: str):
+    if DATA_DIR not in sys.path:
+        sys.path.insert(0, DATA_DIR)
+    return __import__(name)
+
+
+def bench_chunk_and_embed(module_name: str, records: list[dict], embedder) -> dict:
+    module = import_ingestion(module_name)
+
+    t0 = time.perf_counter()
+    built = module.build_chunks(records)
+    chunk_s = time.perf_counter() - t0
+    chunks = built[0]
+
+    t0 = time.perf_counter()
+    embedder.encode(chunks, batch_size=256)
+    embed_s = time.perf_counter() - t0
+
+    return {
+        "records":     len(records),
+        "chunks":      len(chunks),
+        "chunks_per_s": len(chunks) / chunk_s if chunk_s else None,
+        "vectors_per_s": len(chunks) / embed_s if embed_s else None,
+    }
+
+
+def bench_upload(records: list[dict], embedder) -> dict:
+    embed = import_ingestion("embed")
+    upload = import_ingestion("upload_to_pinecone")
+
+    chunks, metadatas = embed.build_chunks(records)
+    collection = FakeCollection()
+    collection.add(
+        documents=chunks,
+        embeddings=embedder.encode(chunks, batch_size=256).tolist(),
+        metadatas=metadatas,
+        ids=[f"chunk_{i}" for i in range(len(chunks))],
+    )
+    index = FakeIndex()
+
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        uploaded = upload.upload_collection(collection, index, collection.count())
+    elapsed = time.perf_counter() - t0
+    return {"vectors": uploaded, "vectors_per_s": uploaded / elapsed if elapsed else None}
+
+
+def bench_ingestion(args, embedder) -> dict:
+    try:
+        import chromadb  # noqa: F401
+    except ImportError as e:
+        print(f"  Skipping ingestion benchmarks ({e}); install the data pipeline dependencies.")
+        return {"skipped": str(e)}
+
+    abstracts = corpus.make_abstracts(args.ingest_size, seed=args.seed)
+    supplements = corpus.make_abstracts(args.ingest_size // 4, seed=args.seed + 1, supplement=True)
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["embed"] = bench_chunk_and_embed("embed", abstracts, embedder)
+        results["embed_supplements"] = bench_chunk_and_embed("embed_supplements", supplements, embedder)
+    results["upload_to_pinecone"] = bench_upload(abstracts, embedder)
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--corpus-size", type=int, default=5000, help="abstracts in the fake index")
+    parser.add_argument("--ingest-size", type=int, default=2000, help="abstracts fed to the ingestion scripts")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="fake time to first token (s)")
+    parser.add_argument("--token-latency", type=float, default=0.002, help="fake time per output token (s)")
+    parser.add_argument("--groq-stub", action="store_true", help="serve the LLM over HTTP from bench.groq_stub")
+    parser.add_argument("--llm-fail-rate", type=float, default=0.0, help="share of stub requests answered 429")
+    parser.add_argument("--llm-stall-rate", type=float, default=0.0, help="share of stub answers delayed 10x")
+    parser.add_argument("--index-latency", type=float, default=0.03, help="fake Pinecone round trip (s)")
+    parser.add_argument("--real-embedder", action="store_true", help="use all-MiniLM-L6-v2 instead of the hashing fake")
+    parser.add_argument("--skip-ingestion", action="store_true")
+    args = parser.parse_args()
+
+    embedder = make_embedder(args.real_embedder)
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git":       git_revision(),
+            "python":    platform.python_version(),
+            "machine":   platform.machine(),
+            "config":    vars(args),
+        },
+    }
+
+    print("Benchmarking query path...")
+    results["query_path"] = bench_query_path(args, embedder)
+    e2e = results["query_path"]["end_to_end"]
+    print(f"  p50 {e2e['p50_ms']:.1f} ms · p95 {e2e['p95_ms']:.1f} ms · "
+          f"{results['query_path']['questions_per_s']:.2f} q/s")
+
+    if not args.skip_ingestion:
+        print("Benchmarking ingestion scripts...")
+        results["ingestion"] = bench_ingestion(args, embedder)
+        for name, r in results["ingestion"].items():
+            if isinstance(r, dict):
+                rates = ", ".join(f"{k} {v:,.0f}" for k, v in r.items() if k.endswith("_per_s") and v)
+                print(f"  {name}: {rates}")
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
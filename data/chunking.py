@@ -0,0 +1,144 @@
+"""
+Text chunking shared by the ingestion scripts.
+
+Two modes with the same size, overlap and separator preferences
+("\\n\\n", then "\\n", then " ", then characters):
+
+  fast    one linear pass: each chunk ends at the largest separator that fits
+          in chunk_size, and the next chunk starts at the earliest boundary
+          of the same kind within chunk_overlap characters of that end.
+  compat  a dependency-free port of LangChain's RecursiveCharacterTextSplitter
+          (keep_separator=True, strip_whitespace=True) that reproduces its
+          chunks byte for byte, for rebuilding an index version identical to
+          the one made before this module existed.
+
+Select with GYMIQ_CHUNKER=fast|compat (default fast).
+"""
+
+import hashlib
+import os
+
+CHUNK_SIZE    = 400
+CHUNK_OVERLAP = 80
+SEPARATORS    = ["\n\n", "\n", " ", ""]
+CHUNKER_MODE  = os.getenv("GYMIQ_CHUNKER", "fast")
+
+
+def get_hash(text: str) -> str:
+    return hashlib.sha256(text.lower().encode()).hexdigest()
+
+
+def abstract_text(item: dict) -> str:
+    text = "\n\n".join(item["contexts"])
+    if item.get("answer"):
+        text += "\n\n" + item["answer"]
+    return text
+
+
+def split_text(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP,
+               mode: str = CHUNKER_MODE) -> list[str]:
+    if mode == "compat":
+        return split_compat(text, chunk_size, chunk_overlap)
+    if mode == "fast":
+        return split_fast(text, chunk_size, chunk_overlap)
+    raise ValueError(f"Unknown chunker mode {mode!r}; expected 'fast' or 'compat'")
+
+
+# ── Fast mode ─────────────────────────────────────────────────────────────────
+
+def split_fast(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> list[str]:
+    chunks = []
+    n = len(text)
+    start = end = 0
+    while start < n:
+        if n - start <= chunk_size:
+            _append_stripped(chunks, text[start:])
+            break
+
+        limit = start + chunk_size
+        # Separators stay at the start of the following chunk, so a cut at
+        # `pos` keeps text[start:pos] and the separator itself may cross limit.
+        # Every cut lies past the previous one, so the pass always advances.
+        lowest = max(start, end) + 1
+        for sep in SEPARATORS[:-1]:
+            pos = text.rfind(sep, lowest, limit + len(sep))
+            if pos != -1:
+                break
+        else:
+            sep, pos = "", limit
+
+        _append_stripped(chunks, text[start:pos])
+        end = pos
+
+        if not sep:
+            start = max(pos - chunk_overlap, start + 1)
+            continue
+        # Overlap: restart at the earliest same-level boundary that still lies
+        # within chunk_overlap characters of the cut.
+        back = text.find(sep, max(pos - chunk_overlap, start + 1), pos)
+        start = back if back != -1 else pos
+    return chunks
+
+
+def _append_stripped(chunks: list[str], piece: str):
+    piece = piece.strip()
+    if piece:
+        chunks.append(piece)
+
+
+# ── Compat mode (LangChain RecursiveCharacterTextSplitter) ────────────────────
+
+def split_compat(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> list[str]:
+    return _split_recursive(text, SEPARATORS, chunk_size, chunk_overlap)
+
+
+def _split_recursive(text: str, separators: list[str], chunk_size: int, chunk_overlap: int) -> list[str]:
+    # The first separator that occurs in the text is used at this level; longer
+    # pieces recurse with the separators after it.
+    separator, remaining = separators[-1], []
+    for i, sep in enumerate(separators):
+        if not sep:
+            separator = sep
+            break
+        if sep in text:
+            separator, remaining = sep, separators[i + 1:]
+            break
+
+    if separator:
+        parts = text.split(separator)
+        splits = [parts[0]] + [separator + p for p in parts[1:]]
+        splits = [s for s in splits if s]
+    else:
+        splits = list(text)
+
+    chunks, good = [], []
+    for s in splits:
+        if len(s) < chunk_size:
+            good.append(s)
+            continue
+        if good:
+            chunks.extend(_merge_splits(good, chunk_size, chunk_overlap))
+            good = []
+        if remaining:
+            chunks.extend(_split_recursive(s, remaining, chunk_size, chunk_overlap))
+        else:
+            chunks.append(s)
+    if good:
+        chunks.extend(_merge_splits(good, chunk_size, chunk_overlap))
+    return chunks
+
+
+def _merge_splits(splits: list[str], chunk_size: int, chunk_overlap: int) -> list[str]:
+    # Splits keep their separator, so they are joined with "".
+    docs, current, total = [], [], 0
+    for d in splits:
+        length = len(d)
+        if total + length > chunk_size and current:
+            _append_stripped(docs, "".join(current))
+            while total > chunk_overlap or (total + length > chunk_size and total > 0):
+                total -= len(current[0])
+                current = current[1:]
+        current.append(d)
+        total += length
+    _append_stripped(docs, "".join(current))
+    return docs
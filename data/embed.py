@@ -4,10 +4,10 @@ Run this once after download.py.
 """
 
 import json
-import hashlib
 import chromadb
 from sentence_transformers import SentenceTransformer
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from chunking import abstract_text, get_hash, split_text
 
 CHROMA_PATH = "./chroma_db"
 COLLECTION_NAME = "gymiq"
@@ -15,28 +15,13 @@ EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 BATCH_SIZE = 256
 
 
-def get_hash(text: str) -> str:
-    return hashlib.sha256(text.lower().encode()).hexdigest()
-
-
-def main():
-    with open("data/fitness_abstracts.json") as f:
-        abstracts = json.load(f)
-
-    print(f"Loaded {len(abstracts)} abstracts")
-
-    splitter = RecursiveCharacterTextSplitter(chunk_size=400, chunk_overlap=80)
-
+def build_chunks(abstracts: list[dict]) -> tuple[list[str], list[dict]]:
     chunks = []
     metadatas = []
     seen_hashes = set()
 
     for item in abstracts:
-        full_text = "\n\n".join(item["contexts"])
-        if item.get("answer"):
-            full_text += "\n\n" + item["answer"]
-
-        for i, chunk in enumerate(splitter.split_text(full_text)):
+        for i, chunk in enumerate(split_text(abstract_text(item))):
             h = get_hash(chunk)
             if h in seen_hashes:
                 continue
@@ -48,6 +33,17 @@ def main():
                 "chunk_index": i,
             })
 
+    return chunks, metadatas
+
+
+def main():
+    with open("data/fitness_abstracts.json") as f:
+        abstracts = json.load(f)
+
+    print(f"Loaded {len(abstracts)} abstracts")
+
+    chunks, metadatas = build_chunks(abstracts)
+
     print(f"Total unique chunks to embed: {len(chunks)}")
     print("Loading embedding model...")
 
@@ -4,13 +4,15 @@ Run after fetch_exercises.py. Does NOT wipe the existing PubMed data.
 """
 
 import json
+import os
 import chromadb
 from sentence_transformers import SentenceTransformer
 
 CHROMA_PATH = "./chroma_db"
 COLLECTION_NAME = "gymiq"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
-INPUT_FILE = "data/exercises.json"
+INPUT_FILE = "data/exercises.jsonl"
+LEGACY_INPUT_FILE = "data/exercises.json"   # written by older versions of fetch_exercises.py
 
 
 def exercise_to_text(ex: dict) -> str:
@@ -37,9 +39,16 @@ def exercise_to_text(ex: dict) -> str:
     return "\n".join(parts)
 
 
-def main():
+def load_exercises() -> list[dict]:
+    if not os.path.exists(INPUT_FILE) and os.path.exists(LEGACY_INPUT_FILE):
+        with open(LEGACY_INPUT_FILE) as f:
+            return json.load(f)
     with open(INPUT_FILE) as f:
-        exercises = json.load(f)
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    exercises = load_exercises()
 
     print(f"Loaded {len(exercises)} exercises")
 
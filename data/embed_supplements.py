@@ -4,50 +4,25 @@ Run after fetch_supplements.py. Does NOT wipe the existing PubMed or exercise da
 """
 
 import json
-import hashlib
 import chromadb
 from sentence_transformers import SentenceTransformer
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from chunking import abstract_text, get_hash, split_text
 
 CHROMA_PATH      = "./chroma_db"
 COLLECTION_NAME  = "gymiq"
 EMBEDDING_MODEL  = "all-MiniLM-L6-v2"
 INPUT_FILE       = "data/supplement_abstracts.json"
-CHUNK_SIZE       = 400
-CHUNK_OVERLAP    = 80
-
-
-def get_hash(text: str) -> str:
-    return hashlib.sha256(text.lower().encode()).hexdigest()
-
-
-def main():
-    with open(INPUT_FILE) as f:
-        abstracts = json.load(f)
 
-    print(f"Loaded {len(abstracts)} supplement abstracts")
-
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
-    )
 
+def build_chunks(abstracts: list[dict]) -> tuple[list[str], list[dict], list[str]]:
     chunks    = []
     metadatas = []
     ids       = []
     seen_hashes = set()
 
-    # Load existing IDs from ChromaDB to avoid collisions
-    chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
-    collection    = chroma_client.get_collection(COLLECTION_NAME)
-    existing_count = collection.count()
-    print(f"Collection currently has {existing_count} documents")
-
     for item in abstracts:
-        full_text = "\n\n".join(item["contexts"])
-        if item.get("answer"):
-            full_text += "\n\n" + item["answer"]
-
-        for i, chunk in enumerate(splitter.split_text(full_text)):
+        for i, chunk in enumerate(split_text(abstract_text(item))):
             h = get_hash(chunk)
             if h in seen_hashes:
                 continue
@@ -63,6 +38,23 @@ def main():
             })
             ids.append(chunk_id)
 
+    return chunks, metadatas, ids
+
+
+def main():
+    with open(INPUT_FILE) as f:
+        abstracts = json.load(f)
+
+    print(f"Loaded {len(abstracts)} supplement abstracts")
+
+    # Load existing IDs from ChromaDB to avoid collisions
+    chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
+    collection    = chroma_client.get_collection(COLLECTION_NAME)
+    existing_count = collection.count()
+    print(f"Collection currently has {existing_count} documents")
+
+    chunks, metadatas, ids = build_chunks(abstracts)
+
     print(f"Total unique chunks to embed: {len(chunks)}")
     print("Loading embedding model...")
     model = SentenceTransformer(EMBEDDING_MODEL)
@@ -1,24 +1,43 @@
 """
-Fetches all exercises from ExerciseDB API (via RapidAPI) and saves to JSON.
+Fetches the full ExerciseDB catalogue (via RapidAPI) and saves it as JSONL.
 Free tier: 1000 requests/month. ExerciseDB has ~1300 exercises, fetched in pages of 100.
 Run once, then run embed_exercises.py to add to ChromaDB.
+
+    python data/fetch_exercises.py [--by-category] [--concurrency 4] [--rate 5]
+
+Every endpoint is paged until it runs out: the first pages of all endpoints
+are requested together, then each endpoint's next page once the last one
+came back full, with up to --concurrency requests in flight and at most
+--rate requests per second. Responses are cached in
+data/.http_cache: within --ttl they are reused without a request, after that
+they are revalidated with ETag / Last-Modified, so reruns cost little or no
+quota. Set EXERCISEDB_URL to point at a local stub (python -m bench.exercisedb_stub).
 """
 
+import argparse
+import hashlib
 import json
 import os
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import quote, urlencode, urlparse
+
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 load_dotenv()
 
 RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
-BASE_URL = "https://exercisedb.p.rapidapi.com/exercises"
-HEADERS = {
-    "x-rapidapi-key": RAPIDAPI_KEY,
-    "x-rapidapi-host": "exercisedb.p.rapidapi.com",
-}
-OUTPUT_FILE = "data/exercises.json"
+BASE_URL     = os.getenv("EXERCISEDB_URL", "https://exercisedb.p.rapidapi.com").rstrip("/")
+OUTPUT_FILE  = "data/exercises.jsonl"
+CACHE_DIR    = "data/.http_cache"
+CACHE_TTL_S  = 7 * 24 * 3600
+PAGE_SIZE    = 100
+CONCURRENCY  = 4
+RATE_LIMIT   = 5.0   # requests per second
+MAX_ATTEMPTS = 4
 
 BODY_PARTS = [
     "back", "cardio", "chest", "lower arms", "lower legs",
@@ -37,69 +56,173 @@ TARGET_MUSCLES = [
 ]
 
 
-def fetch_by_body_part(body_part: str) -> list[dict]:
-    url = f"{BASE_URL}/bodyPart/{requests.utils.quote(body_part)}"
-    params = {"limit": 10, "offset": 0}
-    resp = requests.get(url, headers=HEADERS, params=params)
-    if resp.status_code != 200:
-        print(f"  Error {resp.status_code} for {body_part}: {resp.text}")
-        return []
-    return resp.json()
-
-
-def fetch_by_target(target: str) -> list[dict]:
-    url = f"{BASE_URL}/target/{requests.utils.quote(target)}"
-    params = {"limit": 10, "offset": 0}
-    resp = requests.get(url, headers=HEADERS, params=params)
-    if resp.status_code != 200:
-        print(f"  Error {resp.status_code} for target={target}: {resp.text}")
-        return []
-    return resp.json()
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        time.sleep(max(0.0, slot - now))
+
+
+class CachedClient:
+    """GET with a disk cache, conditional revalidation, rate limiting and retries."""
+
+    def __init__(self, concurrency: int, rate: float, ttl: float, cache_dir: str = CACHE_DIR):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "x-rapidapi-key":  RAPIDAPI_KEY or "",
+            "x-rapidapi-host": urlparse(BASE_URL).netloc,
+        })
+        self.limiter = RateLimiter(rate)
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.stats = {"fresh": 0, "revalidated": 0, "downloaded": 0}
+        self.stats_lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def _count(self, outcome: str):
+        with self.stats_lock:
+            self.stats[outcome] += 1
+
+    def get_json(self, path: str, params: dict):
+        url = f"{BASE_URL}{path}?{urlencode(sorted(params.items()))}"
+        cache_path = self._path(url)
+        cached = None
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                cached = json.load(f)
+            if time.time() - cached["fetched_at"] < self.ttl:
+                self._count("fresh")
+                return cached["body"]
+
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        for attempt in range(MAX_ATTEMPTS):
+            self.limiter.wait()
+            try:
+                resp = self.session.get(url, headers=headers, timeout=30)
+            except requests.RequestException as e:
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+                print(f"  Retrying {path} ({e})")
+                time.sleep(2 ** attempt)
+                continue
+            if resp.status_code == 429 or resp.status_code >= 500:
+                if attempt == MAX_ATTEMPTS - 1:
+                    resp.raise_for_status()
+                retry_after = resp.headers.get("Retry-After", "")
+                time.sleep(float(retry_after) if retry_after.isdigit() else 2 ** attempt)
+                continue
+            break
+
+        if resp.status_code == 304 and cached:
+            self._count("revalidated")
+            body = cached["body"]
+        else:
+            resp.raise_for_status()
+            self._count("downloaded")
+            body = resp.json()
+            cached = {
+                "url":           url,
+                "etag":          resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+            }
+        cached["fetched_at"] = time.time()
+        cached["body"] = body
+        tmp = f"{cache_path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(cached, f)
+        os.replace(tmp, cache_path)
+        return body
+
+
+def fetch_endpoints(client: CachedClient, pool: ThreadPoolExecutor, paths: list[str]) -> dict[str, list[dict]]:
+    """
+    Page through every endpoint until a page comes back short. The first pages
+    of all endpoints go out at once; each endpoint then asks for its next page
+    only once the previous one came back full, so no page past the end is sent.
+    """
+    get_page = lambda path, offset: client.get_json(path, {"limit": PAGE_SIZE, "offset": offset})
+    results = {path: [] for path in paths}
+    pending = {pool.submit(get_page, path, 0): (path, 0) for path in paths}
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            path, offset = pending.pop(future)
+            page = future.result()
+            results[path].extend(page)
+            if len(page) == PAGE_SIZE:
+                offset += PAGE_SIZE
+                pending[pool.submit(get_page, path, offset)] = (path, offset)
+    return results
 
 
 def main():
-    if not RAPIDAPI_KEY:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--by-category", action="store_true",
+                        help="also page every body-part and target-muscle endpoint")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT, help="max requests per second")
+    parser.add_argument("--ttl", type=float, default=CACHE_TTL_S, help="seconds a cached page is used without revalidation")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    if not RAPIDAPI_KEY and "rapidapi.com" in BASE_URL:
         print("Error: RAPIDAPI_KEY not found in .env")
         return
 
-    exercises = []
-    seen_ids = set()
-
-    print("Fetching exercises by body part...")
-    for body_part in BODY_PARTS:
-        print(f"  {body_part}...")
-        batch = fetch_by_body_part(body_part)
-        for ex in batch:
-            if ex["id"] not in seen_ids:
-                seen_ids.add(ex["id"])
-                exercises.append(ex)
-        print(f"    +{len(batch)} (total: {len(exercises)})")
-        time.sleep(0.3)
-
-    print("\nFetching exercises by target muscle...")
-    for target in TARGET_MUSCLES:
-        print(f"  {target}...")
-        batch = fetch_by_target(target)
+    endpoints = ["/exercises"]
+    if args.by_category:
+        endpoints += [f"/exercises/bodyPart/{quote(b)}" for b in BODY_PARTS]
+        endpoints += [f"/exercises/target/{quote(t)}" for t in TARGET_MUSCLES]
+
+    client = CachedClient(args.concurrency, args.rate, args.ttl)
+    exercises = {}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        batches = fetch_endpoints(client, pool, endpoints)
+    for path, batch in batches.items():
         new = 0
         for ex in batch:
-            if ex["id"] not in seen_ids:
-                seen_ids.add(ex["id"])
-                exercises.append(ex)
+            if ex["id"] not in exercises:
+                exercises[ex["id"]] = ex
                 new += 1
-        print(f"    +{new} new (total: {len(exercises)})")
-        time.sleep(0.3)
-
-    print(f"\nTotal exercises fetched: {len(exercises)}")
+        print(f"  {path}: {len(batch)} fetched, +{new} new (total: {len(exercises)})")
 
-    os.makedirs("data", exist_ok=True)
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(exercises, f)
+    stats = client.stats
+    print(f"\nTotal exercises fetched: {len(exercises)} in {time.perf_counter() - start:.1f}s")
+    print(f"Requests: {stats['downloaded']} downloaded, {stats['revalidated']} revalidated (304), "
+          f"{stats['fresh']} served from cache without a request")
 
-    print(f"Saved to {OUTPUT_FILE}")
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    tmp = args.output + ".tmp"
+    with open(tmp, "w") as f:
+        for ex in exercises.values():
+            f.write(json.dumps(ex) + "\n")
+    os.replace(tmp, args.output)
+    print(f"Saved to {args.output}")
 
     # Preview first exercise to confirm structure
     if exercises:
-        ex = exercises[0]
+        ex = next(iter(exercises.values()))
         print(f"\nSample exercise fields: {list(ex.keys())}")
         print(f"Example: {ex.get('name')} — {ex.get('bodyPart')} / {ex.get('target')}")
 
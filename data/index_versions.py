@@ -0,0 +1,230 @@
+"""
+Blue/green index versions for the Pinecone index.
+
+Each re-ingestion (upload_to_pinecone.py) builds a new namespace in the
+`gymiq` index. The app queries whichever namespace the alias record in the
+`__alias__` namespace points at, so switching versions is a single upsert and
+reaches every session within GYMIQ_ALIAS_TTL seconds.
+
+    python data/index_versions.py status
+    python data/index_versions.py warm v20250101-120000
+    python data/index_versions.py promote v20250101-120000
+    python data/index_versions.py rollback
+    python data/index_versions.py gc --keep 1 [--yes]
+
+Before the first promote the app reads the default namespace "", which holds
+the original single-version upload.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Optional
+from dotenv import load_dotenv
+from pinecone import Pinecone
+from sentence_transformers import SentenceTransformer
+
+load_dotenv()
+
+PINECONE_INDEX  = "gymiq"
+ALIAS_NAMESPACE = "__alias__"
+ALIAS_ID        = "active"
+EMBEDDING_DIM   = 384
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+PROBE_FILE      = "data/fitness_abstracts.json"
+PROBE_COUNT     = 50
+WARM_ROUNDS     = 2     # the first round pays for cold caches; the last one is reported
+TOP_K           = 20
+HIT_TOLERANCE   = 0.05  # candidate may trail the live version's probe hit rate by this much
+
+# Used when the abstracts file is not around: these only check that results come back.
+FALLBACK_PROBES = [
+    "Does creatine improve strength?",
+    "How much protein should I eat to build muscle?",
+    "Is high-intensity interval training better than steady cardio for fat loss?",
+    "Does caffeine improve endurance performance?",
+    "What rep range is best for hypertrophy?",
+]
+
+
+def label(namespace: str) -> str:
+    return namespace or '"" (default)'
+
+
+def read_alias(index) -> dict:
+    record = index.fetch(ids=[ALIAS_ID], namespace=ALIAS_NAMESPACE).vectors.get(ALIAS_ID)
+    return dict(record.metadata) if record is not None else {"namespace": ""}
+
+
+def write_alias(index, namespace: str, previous: Optional[str]):
+    metadata = {"namespace": namespace, "promoted_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+    if previous is not None:
+        metadata["previous"] = previous
+    # Pinecone rejects all-zero vectors under cosine, so the alias gets a unit vector.
+    values = [1.0] + [0.0] * (EMBEDDING_DIM - 1)
+    index.upsert(vectors=[{"id": ALIAS_ID, "values": values, "metadata": metadata}], namespace=ALIAS_NAMESPACE)
+
+
+def versions(index) -> dict[str, int]:
+    namespaces = index.describe_index_stats().namespaces
+    return {
+        name: ns.vector_count
+        for name, ns in namespaces.items()
+        if name != ALIAS_NAMESPACE
+    }
+
+
+def load_probes(count: int, seed: int) -> list[dict]:
+    if not os.path.exists(PROBE_FILE):
+        return [{"question": q, "pubmed_id": None} for q in FALLBACK_PROBES]
+    with open(PROBE_FILE) as f:
+        records = [r for r in json.load(f) if r.get("question")]
+    sample = random.Random(seed).sample(records, min(count, len(records)))
+    return [{"question": r["question"], "pubmed_id": str(r["pubmed_id"])} for r in sample]
+
+
+def warm(index, embedder, namespace: str, probes: list[dict]) -> dict:
+    """Run the probe set against one version and report latency and hit rate."""
+    embeddings = embedder.encode([p["question"] for p in probes]).tolist()
+
+    for _ in range(WARM_ROUNDS):
+        latencies, hits, empty = [], 0, 0
+        for probe, emb in zip(probes, embeddings):
+            t0 = time.perf_counter()
+            matches = index.query(vector=emb, top_k=TOP_K, include_metadata=True, namespace=namespace).matches
+            latencies.append(time.perf_counter() - t0)
+            empty += not matches
+            hits += any(str(m.metadata.get("pubmed_id")) == probe["pubmed_id"] for m in matches)
+
+    latencies.sort()
+    scored = sum(p["pubmed_id"] is not None for p in probes)
+    return {
+        "probes":   len(probes),
+        "empty":    empty,
+        "hit_rate": hits / scored if scored else None,
+        "p50_ms":   statistics.median(latencies) * 1000,
+        "p95_ms":   latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000,
+    }
+
+
+def print_warm(namespace: str, result: dict):
+    hit = f"hit@{TOP_K} {result['hit_rate']:.0%} · " if result["hit_rate"] is not None else ""
+    print(f"  {label(namespace)}: {hit}p50 {result['p50_ms']:.0f} ms · p95 {result['p95_ms']:.0f} ms · "
+          f"{result['empty']}/{result['probes']} probes empty")
+
+
+def cmd_status(index, args):
+    alias = read_alias(index)
+    for name, count in sorted(versions(index).items()):
+        marker = "  ← active" if name == alias["namespace"] else "  ← previous" if name == alias.get("previous") else ""
+        print(f"  {label(name):<24} {count:>8} vectors{marker}")
+    if "promoted_at" in alias:
+        print(f"Active since {alias['promoted_at']}")
+
+
+def cmd_warm(index, args) -> Optional[dict]:
+    counts = versions(index)
+    if not counts.get(args.version):
+        print(f"Error: version '{args.version}' is missing or empty")
+        return None
+    embedder = SentenceTransformer(EMBEDDING_MODEL)
+    probes = load_probes(args.probes, args.seed)
+    print(f"Warming {label(args.version)} ({counts[args.version]} vectors) with {len(probes)} probes...")
+    result = warm(index, embedder, args.version, probes)
+    print_warm(args.version, result)
+    if result["empty"]:
+        print("Error: some probes returned no results")
+        return None
+
+    live = read_alias(index)["namespace"]
+    if live != args.version and counts.get(live) and result["hit_rate"] is not None:
+        baseline = warm(index, embedder, live, probes)
+        print_warm(live, baseline)
+        if result["hit_rate"] < baseline["hit_rate"] - HIT_TOLERANCE:
+            print(f"Error: {label(args.version)} recalls fewer probe sources than the live version")
+            return None
+    return result
+
+
+def cmd_promote(index, args):
+    if not versions(index).get(args.version):
+        print(f"Error: version '{args.version}' is missing or empty")
+        sys.exit(1)
+    if not args.skip_warm and cmd_warm(index, args) is None and not args.force:
+        print("Not promoted (use --force to override)")
+        sys.exit(1)
+    current = read_alias(index)["namespace"]
+    if current == args.version:
+        print(f"{label(args.version)} is already active")
+        return
+    write_alias(index, args.version, previous=current)
+    print(f"Promoted {label(args.version)} (was {label(current)}). Roll back with: python data/index_versions.py rollback")
+
+
+def cmd_rollback(index, args):
+    alias = read_alias(index)
+    previous = alias.get("previous")
+    if previous is None or previous not in versions(index):
+        print("Error: no previous version to roll back to")
+        sys.exit(1)
+    write_alias(index, previous, previous=alias["namespace"])
+    print(f"Rolled back to {label(previous)} (was {label(alias['namespace'])})")
+
+
+def cmd_gc(index, args):
+    alias = read_alias(index)
+    protected = {alias["namespace"], alias.get("previous")}
+    # Version names are timestamps, so newest first; the default namespace sorts last.
+    candidates = sorted((v for v in versions(index) if v not in protected), reverse=True)
+    doomed = candidates[args.keep:]
+    if not doomed:
+        print("Nothing to delete")
+        return
+    for name in doomed:
+        if args.yes:
+            index.delete(delete_all=True, namespace=name)
+            print(f"  Deleted {label(name)}")
+        else:
+            print(f"  Would delete {label(name)}")
+    if not args.yes:
+        print("Dry run; pass --yes to delete")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("status", help="list versions and the active alias")
+    for name in ("warm", "promote"):
+        p = sub.add_parser(name, help=f"{name} an index version")
+        p.add_argument("version")
+        p.add_argument("--probes", type=int, default=PROBE_COUNT)
+        p.add_argument("--seed", type=int, default=0)
+        if name == "promote":
+            p.add_argument("--skip-warm", action="store_true")
+            p.add_argument("--force", action="store_true", help="promote even if the warm-up checks fail")
+    sub.add_parser("rollback", help="point the alias back at the previous version")
+    p = sub.add_parser("gc", help="delete versions that are neither active nor previous")
+    p.add_argument("--keep", type=int, default=0, help="also keep the N newest other versions")
+    p.add_argument("--yes", action="store_true", help="actually delete")
+    args = parser.parse_args()
+
+    api_key = os.getenv("PINECONE_API_KEY")
+    if not api_key:
+        print("Error: PINECONE_API_KEY not found in .env")
+        return
+    index = Pinecone(api_key=api_key).Index(PINECONE_INDEX)
+
+    if args.command == "warm":
+        if cmd_warm(index, args) is None:
+            sys.exit(1)
+    else:
+        {"status": cmd_status, "promote": cmd_promote, "rollback": cmd_rollback, "gc": cmd_gc}[args.command](index, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 """
-One-time migration: exports all vectors from local ChromaDB and uploads to Pinecone.
-Run once before deploying. Requires PINECONE_API_KEY in .env.
-Takes 5-15 minutes for 65K vectors.
+Exports all vectors from local ChromaDB and uploads them to Pinecone as a new
+index version (namespace), leaving the version users are querying untouched.
+Promote it with data/index_versions.py once it is warmed.
+Requires PINECONE_API_KEY in .env. Takes 5-15 minutes for 65K vectors.
+
+    python data/upload_to_pinecone.py [--version v20250101-120000]
 """
 
+import argparse
 import os
 import time
 from dotenv import load_dotenv
@@ -28,45 +32,18 @@ def wait_for_index(pc: Pinecone, name: str):
     print(" ready!")
 
 
-def main():
-    api_key = os.getenv("PINECONE_API_KEY")
-    if not api_key:
-        print("Error: PINECONE_API_KEY not found in .env")
-        return
-
-    # ── ChromaDB ──────────────────────────────────────────────────────────────
-    print("Connecting to ChromaDB...")
-    chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
-    collection    = chroma_client.get_collection(COLLECTION_NAME)
-    total         = collection.count()
-    print(f"  {total} documents to migrate")
+def new_version_name() -> str:
+    return time.strftime("v%Y%m%d-%H%M%S")
 
-    # ── Pinecone ──────────────────────────────────────────────────────────────
-    print("Connecting to Pinecone...")
-    pc = Pinecone(api_key=api_key)
-
-    existing = [idx.name for idx in pc.list_indexes()]
-    if PINECONE_INDEX not in existing:
-        print(f"  Creating index '{PINECONE_INDEX}' (dim={EMBEDDING_DIM}, cosine)...")
-        pc.create_index(
-            name=PINECONE_INDEX,
-            dimension=EMBEDDING_DIM,
-            metric="cosine",
-            spec=ServerlessSpec(cloud="aws", region="us-east-1"),
-        )
-        wait_for_index(pc, PINECONE_INDEX)
-    else:
-        print(f"  Index '{PINECONE_INDEX}' already exists")
-
-    index = pc.Index(PINECONE_INDEX)
 
+def upload_collection(collection, index, total: int, namespace: str = "") -> int:
     # ── Fetch all IDs from ChromaDB ───────────────────────────────────────────
     print("Fetching all IDs from ChromaDB...")
     all_ids = collection.get(include=[])["ids"]
     print(f"  {len(all_ids)} IDs fetched")
 
     # ── Upload in batches ─────────────────────────────────────────────────────
-    print("Uploading to Pinecone...")
+    print(f"Uploading to Pinecone namespace '{namespace}'...")
     uploaded = 0
 
     for i in range(0, len(all_ids), CHROMA_FETCH):
@@ -90,15 +67,60 @@ def main():
 
         # Upsert in Pinecone-sized sub-batches
         for j in range(0, len(vectors), PINECONE_BATCH):
-            index.upsert(vectors=vectors[j : j + PINECONE_BATCH])
+            index.upsert(vectors=vectors[j : j + PINECONE_BATCH], namespace=namespace)
             uploaded += len(vectors[j : j + PINECONE_BATCH])
 
         print(f"  {uploaded}/{total} uploaded ({uploaded * 100 // total}%)")
         time.sleep(0.05)
 
-    print(f"\nDone! {uploaded} vectors in Pinecone.")
-    stats = index.describe_index_stats()
-    print(f"Index stats: {stats.total_vector_count} total vectors")
+    return uploaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload ChromaDB into a new Pinecone index version.")
+    parser.add_argument("--version", default=new_version_name(), help="namespace to build (default: timestamp)")
+    args = parser.parse_args()
+
+    api_key = os.getenv("PINECONE_API_KEY")
+    if not api_key:
+        print("Error: PINECONE_API_KEY not found in .env")
+        return
+
+    # ── ChromaDB ──────────────────────────────────────────────────────────────
+    print("Connecting to ChromaDB...")
+    chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
+    collection    = chroma_client.get_collection(COLLECTION_NAME)
+    total         = collection.count()
+    print(f"  {total} documents to migrate")
+
+    # ── Pinecone ──────────────────────────────────────────────────────────────
+    print("Connecting to Pinecone...")
+    pc = Pinecone(api_key=api_key)
+
+    existing = [idx.name for idx in pc.list_indexes()]
+    if PINECONE_INDEX not in existing:
+        print(f"  Creating index '{PINECONE_INDEX}' (dim={EMBEDDING_DIM}, cosine)...")
+        pc.create_index(
+            name=PINECONE_INDEX,
+            dimension=EMBEDDING_DIM,
+            metric="cosine",
+            spec=ServerlessSpec(cloud="aws", region="us-east-1"),
+        )
+        wait_for_index(pc, PINECONE_INDEX)
+    else:
+        print(f"  Index '{PINECONE_INDEX}' already exists")
+
+    index = pc.Index(PINECONE_INDEX)
+
+    existing_versions = index.describe_index_stats().namespaces
+    if args.version in existing_versions:
+        print(f"Error: version '{args.version}' already exists; pick a new --version")
+        return
+
+    uploaded = upload_collection(collection, index, total, namespace=args.version)
+
+    print(f"\nDone! {uploaded} vectors in version '{args.version}'.")
+    print(f"Warm and switch to it with: python data/index_versions.py promote {args.version}")
 
 
 if __name__ == "__main__":
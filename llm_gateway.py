@@ -0,0 +1,219 @@
+"""
+Shared gateway for every Groq chat completion.
+
+One pooled keep-alive client is reused across calls and Streamlit sessions.
+Each call gets a deadline, retries 429/5xx/timeouts with jittered backoff,
+can hedge a duplicate request once the primary is slower than the observed
+p95, and falls back to a smaller model when the primary stays saturated.
+Every call is admitted through admission.controller first so the shared
+token budget is respected; each further HTTP request it makes (retry, hedge
+or fallback) is charged to the same budget.
+
+Set GROQ_BASE_URL to point the client at a local OpenAI-compatible fake
+(Groq serves completions under /openai/v1/chat/completions).
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+from groq import APIConnectionError, APIStatusError, APITimeoutError, Groq, RateLimitError
+
+import admission
+from tracing import span
+
+load_dotenv()
+
+LLM_MODEL         = os.getenv("GYMIQ_LLM_MODEL", "llama-3.3-70b-versatile")
+FALLBACK_MODEL    = os.getenv("GYMIQ_FALLBACK_MODEL", "llama-3.1-8b-instant")  # "" disables
+DEADLINE_S        = float(os.getenv("GYMIQ_LLM_DEADLINE", "30"))
+MAX_ATTEMPTS      = int(os.getenv("GYMIQ_LLM_MAX_ATTEMPTS", "4"))
+BACKOFF_BASE_S    = 0.5
+BACKOFF_CAP_S     = 8.0
+HEDGE_ENABLED     = os.getenv("GYMIQ_LLM_HEDGE", "0") == "1"
+HEDGE_MIN_SAMPLES = 20    # latencies observed before the p95 is trusted
+LATENCY_WINDOW    = 200   # recent successful call latencies kept for the p95
+POOL_SIZE         = 20    # max pooled connections to the API
+KEEPALIVE_S       = 60
+
+SATURATED_STATUS = {429, 503, 529}
+
+_client = None
+_client_lock = threading.Lock()
+_latencies = deque(maxlen=LATENCY_WINDOW)
+_latencies_lock = threading.Lock()
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+def get_client() -> Groq:
+    global _client
+    with _client_lock:
+        if _client is None:
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=POOL_SIZE,
+                    max_keepalive_connections=POOL_SIZE,
+                    keepalive_expiry=KEEPALIVE_S,
+                ),
+                timeout=DEADLINE_S,
+            )
+            # Retries are handled here so they respect the per-call deadline.
+            _client = Groq(
+                api_key=os.getenv("GROQ_API_KEY"),
+                max_retries=0,
+                http_client=http_client,
+            )
+    return _client
+
+
+def p95_latency() -> Optional[float]:
+    with _latencies_lock:
+        if len(_latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(_latencies)
+    return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+def _is_retryable(e: Exception) -> bool:
+    if isinstance(e, (APITimeoutError, APIConnectionError)):
+        return True
+    return isinstance(e, APIStatusError) and (e.status_code in SATURATED_STATUS or e.status_code >= 500)
+
+
+def _is_saturated(e: Exception) -> bool:
+    return isinstance(e, APIStatusError) and e.status_code in SATURATED_STATUS
+
+
+def _backoff(attempt: int, e: Exception) -> float:
+    delay = random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt))
+    if isinstance(e, RateLimitError):
+        try:
+            delay = max(delay, float(e.response.headers.get("retry-after", 0)))
+        except ValueError:
+            pass
+    return delay
+
+
+def _call(model: str, messages: list[dict], temperature: float, max_tokens: int, expires: float,
+          tickets: list):
+    """
+    Send one request. The first request of a call uses the ticket admission
+    granted (popped from tickets); every later one is charged as a new ticket.
+    Each ticket is reconciled to the tokens billed, or to 0 if the request
+    failed, which still leaves it counted against the RPM budget.
+    """
+    remaining = expires - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded(f"LLM deadline exceeded before calling {model}")
+    try:
+        ticket = tickets.pop()
+    except IndexError:
+        ticket = admission.controller.charge(admission.estimate_tokens(messages, max_tokens))
+    start = time.monotonic()
+    try:
+        response = get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=remaining,
+        )
+    except Exception:
+        admission.controller.reconcile(ticket, 0)
+        raise
+    with _latencies_lock:
+        _latencies.append(time.monotonic() - start)
+    if response.usage is not None:
+        admission.controller.reconcile(ticket, response.usage.total_tokens)
+    return response
+
+
+def _hedged_call(model: str, messages: list[dict], temperature: float, max_tokens: int, expires: float,
+                 tickets: list):
+    """
+    Run the call in the caller's thread, so hedging never caps how many
+    completions are in flight. Once the call has outlived the observed p95 a
+    duplicate is sent from _hedge_pool; if the primary then fails, the
+    duplicate's answer is used instead of starting a retry from scratch.
+    """
+    hedge_after = p95_latency() if HEDGE_ENABLED else None
+    if hedge_after is None:
+        return _call(model, messages, temperature, max_tokens, expires, tickets)
+
+    primary_done = threading.Event()
+
+    def duplicate():
+        if primary_done.wait(hedge_after):
+            return None   # the primary finished first; no duplicate sent
+        return _call(model, messages, temperature, max_tokens, expires, tickets)
+
+    hedge = _hedge_pool.submit(duplicate)
+    try:
+        return _call(model, messages, temperature, max_tokens, expires, tickets)
+    except Exception:
+        primary_done.set()
+        if hedge.cancel():
+            raise
+        # Raises the duplicate's own error, with the primary's as its context.
+        result = hedge.result(timeout=max(0.0, expires - time.monotonic()))
+        if result is None:
+            raise
+        return result
+    finally:
+        primary_done.set()
+
+
+def _with_retries(model: str, messages: list[dict], temperature: float, max_tokens: int, expires: float,
+                  tickets: list):
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            return _hedged_call(model, messages, temperature, max_tokens, expires, tickets)
+        except Exception as e:
+            if not _is_retryable(e) or attempt == MAX_ATTEMPTS - 1:
+                raise
+            delay = _backoff(attempt, e)
+            if time.monotonic() + delay >= expires:
+                raise
+            time.sleep(delay)
+
+
+def complete(
+    messages: list[dict],
+    *,
+    temperature: float,
+    max_tokens: int,
+    model: str = LLM_MODEL,
+    deadline: float = DEADLINE_S,
+    priority: int = admission.PRIORITY_RESEARCH,
+    max_wait: Optional[float] = None,
+    stage: str = "llm",
+):
+    """Run one chat completion and return the raw Groq response.
+
+    Time spent queued for the budget is traced as "admission_wait", the rest
+    of the call as `stage`. Raises admission.AdmissionRejected if the shared
+    budget cannot fit the request within max_wait seconds.
+    """
+    with span("admission_wait"):
+        ticket = admission.controller.acquire(
+            admission.estimate_tokens(messages, max_tokens), priority, max_wait
+        )
+    with span(stage):
+        expires = time.monotonic() + deadline
+        tickets = [ticket]
+        try:
+            return _with_retries(model, messages, temperature, max_tokens, expires, tickets)
+        except Exception as e:
+            if not _is_saturated(e) or not FALLBACK_MODEL or model == FALLBACK_MODEL:
+                raise
+            return _with_retries(FALLBACK_MODEL, messages, temperature, max_tokens, expires, tickets)
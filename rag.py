@@ -0,0 +1,388 @@
+"""
+Question-answering pipeline behind the Streamlit app: embedding, Pinecone
+retrieval, extractive context compression, LLM synthesis and the Gym Bro
+translation.
+
+Kept out of app.py so the embedder, index handle and worker pools survive
+Streamlit reruns and can be reused by headless tools.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import numpy as np
+from dotenv import load_dotenv
+from pinecone import Pinecone
+from sentence_transformers import SentenceTransformer
+
+import admission
+import llm_gateway
+import tracing
+from tracing import span
+
+load_dotenv()
+
+PINECONE_INDEX  = "gymiq"
+ALIAS_NAMESPACE = "__alias__"   # holds one record naming the live index version
+ALIAS_ID        = "active"
+ALIAS_TTL_S     = float(os.getenv("GYMIQ_ALIAS_TTL", "30"))
+TOP_K          = 20
+MAX_SUBQUERIES = 3
+MIN_SUBQUERY_WORDS = 3
+COMPRESS_CONTEXT   = os.getenv("GYMIQ_COMPRESS", "1") != "0"
+EVIDENCE_SENTENCES = int(os.getenv("GYMIQ_EVIDENCE_SENTENCES", "24"))
+MIN_SENTENCE_CHARS = 25   # shorter fragments are merged into a neighbouring sentence
+
+# Split compound questions at "?", ";" or a conjunction that starts a new question.
+_SUBQUERY_SPLIT = re.compile(
+    r"\?\s+|;\s*|,?\s+(?:and|also|plus)\s+(?=(?:what|which|how|does|do|is|are|can|should|why|when|best|top)\b)",
+    re.IGNORECASE,
+)
+
+# A clause with a pronoun in its first three words ("does it work for women",
+# "how does it compare") refers back to the previous clause's subject, so it
+# stays attached to that clause.
+_REFERS_BACK = re.compile(
+    r"(?:\w+\s+){0,2}(?:it|its|they|them|their|this|that|these|those|he|she|him|her)\b",
+    re.IGNORECASE,
+)
+
+# A conjunction left at the start of a clause after a "?" or ";" split.
+_LEADING_CONJUNCTION = re.compile(r"(?:and|also|plus)\s+", re.IGNORECASE)
+
+# Sentence ends followed by a capitalised word or number, or line breaks.
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\[])|\n+")
+
+# Abbreviations whose period does not end a sentence ("Smith et al. Found", "vs. Placebo").
+_ABBREVIATION = re.compile(
+    r"\b(?:et al|vs|e\.g|i\.e|approx|ca|cf|resp|Fig|Figs|Tab|Ref|No|Dr|Prof|Mr|Mrs|Ms)\.$",
+    re.IGNORECASE,
+)
+
+logger = logging.getLogger("gymiq.rag")
+
+_embedder = None
+_pinecone_index = None
+_search_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="pinecone-search")
+_alias = ("", float("-inf"))   # (namespace, resolved_at)
+_alias_lock = threading.Lock()
+
+
+def get_embedder() -> SentenceTransformer:
+    global _embedder
+    if _embedder is None:
+        _embedder = SentenceTransformer("all-MiniLM-L6-v2")
+    return _embedder
+
+
+def embed_query(text: str) -> list[float]:
+    return get_embedder().encode(text).tolist()
+
+
+def get_pinecone_index():
+    global _pinecone_index
+    if _pinecone_index is None:
+        pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+        _pinecone_index = pc.Index(PINECONE_INDEX)
+    return _pinecone_index
+
+
+def active_namespace() -> str:
+    """
+    Namespace of the live index version, as named by the alias record that
+    data/index_versions.py promotes. Re-read at most every ALIAS_TTL_S, so a
+    cutover or rollback reaches every session within that time. Once resolved,
+    one thread refreshes it while the others keep using the stale value; only
+    the very first lookup waits. Before any version is promoted this is the
+    default namespace "".
+    """
+    global _alias
+    namespace, resolved_at = _alias
+    if time.monotonic() - resolved_at < ALIAS_TTL_S:
+        return namespace
+    if not _alias_lock.acquire(blocking=resolved_at == float("-inf")):
+        return namespace
+    try:
+        namespace, resolved_at = _alias
+        if time.monotonic() - resolved_at < ALIAS_TTL_S:
+            return namespace
+        with span("alias_refresh"):
+            try:
+                record = get_pinecone_index().fetch(ids=[ALIAS_ID], namespace=ALIAS_NAMESPACE).vectors.get(ALIAS_ID)
+                if record is not None:
+                    namespace = record.metadata["namespace"]
+            except Exception as e:
+                logger.warning("Could not resolve index alias, staying on %r: %s", namespace, e)
+        _alias = (namespace, time.monotonic())
+    finally:
+        _alias_lock.release()
+    return namespace
+
+
+def decompose_question(question: str) -> list[str]:
+    """Split a compound question into standalone sub-queries (rule based, no LLM call).
+
+    Short clauses and clauses that refer back with a pronoun are not split
+    off; they stay in the previous sub-query, with the original wording. A
+    sub-query never starts with "and", "also" or "plus".
+    """
+    spans = []   # [start, end] of each sub-query in the question
+    start = 0
+    for match in [*_SUBQUERY_SPLIT.finditer(question), None]:
+        end = match.start() if match else len(question)
+        lead = _LEADING_CONJUNCTION.match(question, start, end)
+        if lead:
+            start = lead.end()
+        part = question[start:end].strip(" ?,")
+        if part:
+            if spans and (len(part.split()) < MIN_SUBQUERY_WORDS or _REFERS_BACK.match(part)):
+                spans[-1][1] = end
+            else:
+                spans.append([start, end])
+        if match:
+            start = match.end()
+    if len(spans) > MAX_SUBQUERIES:
+        spans[MAX_SUBQUERIES - 1:] = [[spans[MAX_SUBQUERIES - 1][0], spans[-1][1]]]
+    subqueries = [question[s:e].strip(" ?,") for s, e in spans]
+    return subqueries or [question]
+
+
+def merge_matches(match_lists: list[list], top_k: int) -> list:
+    """Merge per-subquery results so each sub-query gets an equal share of top_k."""
+    quota = -(-top_k // len(match_lists))
+    seen = set()
+    picked = []
+    for matches in match_lists:
+        chosen = []
+        for m in matches:
+            if len(chosen) == quota:
+                break
+            if m.id not in seen:
+                seen.add(m.id)
+                chosen.append(m)
+        picked.append(chosen)
+
+    # Interleave by rank so every sub-query is represented near the top.
+    merged = []
+    for rank in range(quota):
+        merged.extend(chosen[rank] for chosen in picked if rank < len(chosen))
+
+    if len(merged) < top_k:
+        leftovers = sorted(
+            (m for matches in match_lists for m in matches if m.id not in seen),
+            key=lambda m: m.score,
+            reverse=True,
+        )
+        for m in leftovers:
+            if m.id not in seen:
+                seen.add(m.id)
+                merged.append(m)
+    return merged[:top_k]
+
+
+def plan_subqueries(question: str) -> list[str]:
+    subqueries = decompose_question(question)
+    # A single-topic question is embedded verbatim, as it always was.
+    return subqueries if len(subqueries) > 1 else [question]
+
+
+def search(embeddings: list[list[float]]) -> list:
+    """Query Pinecone once per sub-query embedding, concurrently, and merge the results."""
+    index = get_pinecone_index()
+    namespace = active_namespace()
+    with span("pinecone_query"):
+        if len(embeddings) == 1:
+            return index.query(
+                vector=embeddings[0], top_k=TOP_K, include_metadata=True, namespace=namespace
+            ).matches
+        futures = [
+            _search_pool.submit(
+                index.query, vector=emb, top_k=TOP_K, include_metadata=True, namespace=namespace
+            )
+            for emb in embeddings
+        ]
+        match_lists = [f.result().matches for f in futures]
+    return merge_matches(match_lists, TOP_K)
+
+
+def retrieve(question: str) -> tuple[list, np.ndarray]:
+    """Return the matches and the query embeddings they were searched with."""
+    subqueries = plan_subqueries(question)
+    with span("embed"):
+        if len(subqueries) == 1:
+            embeddings = [embed_query(question)]
+        else:
+            embeddings = get_embedder().encode(subqueries).tolist()
+    return search(embeddings), np.asarray(embeddings)
+
+
+def split_sentences(text: str) -> list[str]:
+    """
+    Split text into sentences. A split after an abbreviation is undone, and a
+    fragment shorter than MIN_SENTENCE_CHARS joins the previous sentence (or
+    the next one, at the start), so no text is dropped.
+    """
+    sentences = []
+    for piece in _SENTENCE_SPLIT.split(text):
+        piece = piece.strip()
+        if not piece:
+            continue
+        if sentences and (
+            _ABBREVIATION.search(sentences[-1])
+            or len(piece) < MIN_SENTENCE_CHARS
+            or len(sentences[-1]) < MIN_SENTENCE_CHARS
+        ):
+            sentences[-1] += " " + piece
+        else:
+            sentences.append(piece)
+    return sentences
+
+
+def select_evidence(docs: list[str], query_vectors: np.ndarray) -> list[list[str]]:
+    """
+    Keep the EVIDENCE_SENTENCES sentences across all docs that are closest to
+    any of the query embeddings retrieve() searched with, so only the
+    sentences are encoded here. Returns the kept sentences of each doc in
+    their original order; sentences repeated by chunk overlap are kept once,
+    under the first doc that has them.
+    """
+    first_seen = {}
+    for d, doc in enumerate(docs):
+        for i, sentence in enumerate(split_sentences(doc)):
+            first_seen.setdefault(sentence, (d, i))
+    sentences = list(first_seen)
+    evidence = [[] for _ in docs]
+    if not sentences:
+        return evidence
+
+    queries = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    with span("compress"):
+        vectors = get_embedder().encode(sentences, batch_size=128, normalize_embeddings=True)
+        scores = (vectors @ queries.T).max(axis=1)
+        keep = np.argsort(-scores)[:EVIDENCE_SENTENCES]
+
+    for k in sorted(keep, key=lambda k: first_seen[sentences[k]]):
+        evidence[first_seen[sentences[k]][0]].append(sentences[k])
+    return evidence
+
+
+def source_tag(meta: dict) -> str:
+    if meta.get("pubmed_id"):
+        return f"PMID {meta['pubmed_id']}"
+    if meta.get("name"):
+        return f"Exercise: {meta['name'].title()}"
+    return "Source"
+
+
+def answer_question(question: str) -> tuple[str, list[dict]]:
+    with span("answer_question"):
+        matches, query_vectors = retrieve(question)
+        return synthesize(question, matches, query_vectors)
+
+
+def synthesize(
+    question: str,
+    matches: list,
+    query_vectors: np.ndarray,
+    priority: int = admission.PRIORITY_RESEARCH,
+    max_wait: Optional[float] = None,
+) -> tuple[str, list[dict]]:
+    docs  = [m.metadata.get("text", "") for m in matches]
+    metas = [m.metadata for m in matches]
+    if COMPRESS_CONTEXT:
+        evidence = select_evidence(docs, query_vectors)
+        context = "\n\n".join(
+            f"[{source_tag(meta)}] " + " ".join(sentences)
+            for sentences, meta in zip(evidence, metas)
+            if sentences
+        )
+    else:
+        evidence = [[] for _ in docs]
+        context = "\n\n---\n\n".join(docs)
+    tracing.count("context_chars_retrieved", sum(map(len, docs)))
+    tracing.count("context_chars_sent", len(context))
+
+    response = llm_gateway.complete(
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    "You are a fitness and sports science assistant. "
+                    "You are given excerpts from multiple PubMed research abstracts, each tagged with its source. "
+                    "Your job is to synthesize findings across ALL of them, not just one. "
+                    "Important rules:\n"
+                    "- If studies conflict, report BOTH sides (e.g. 'some studies show X, while others find Y')\n"
+                    "- Do not draw a conclusion from a single study if others contradict it\n"
+                    "- Note if results depend on dose, population, or training status\n"
+                    "- Be specific and cite findings with their source tag (e.g. [PMID 12345]), but keep the answer practical\n"
+                    "- If none of the abstracts are relevant, say: 'I couldn't find relevant research on this in the database.'"
+                ),
+            },
+            {
+                "role": "user",
+                "content": f"Research excerpts:\n{context}\n\nQuestion: {question}",
+            },
+        ],
+        temperature=0,
+        max_tokens=512,
+        priority=priority,
+        max_wait=max_wait,
+        stage="llm_answer",
+    )
+    tracing.record_usage("llm_answer", response.usage)
+
+    answer = response.choices[0].message.content
+
+    sources = [
+        {
+            "text": doc,
+            "question": meta.get("question", ""),
+            "pubmed_id": meta.get("pubmed_id", ""),
+            "source": meta.get("source", "pubmed"),
+            "name": meta.get("name", ""),
+            "evidence": sentences,
+        }
+        for doc, meta, sentences in zip(docs, metas, evidence)
+    ]
+    # Sources the answer drew on come first, in retrieval order.
+    sources.sort(key=lambda source: not source["evidence"])
+
+    return answer, sources
+
+
+def translate_to_gymbro(
+    scientific_answer: str,
+    priority: int = admission.PRIORITY_TRANSLATION,
+    max_wait: Optional[float] = None,
+) -> str:
+    response = llm_gateway.complete(
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    "You are a hyped-up gym bro who translates scientific fitness research into "
+                    "simple, energetic gym slang. Use words like: bro, gains, swole, jacked, "
+                    "crushing it, beast mode, pump, PR, grind, no days off, get after it. "
+                    "Keep the actual facts accurate but make it sound like you're hyping up "
+                    "your buddy before a workout. Keep it short — 3 to 5 sentences max. "
+                    "If the original answer says there's no info available, say something like "
+                    "'Bro the science hasn't caught up to your grind yet, but keep lifting!'"
+                ),
+            },
+            {
+                "role": "user",
+                "content": f"Translate this into gym bro language:\n\n{scientific_answer}",
+            },
+        ],
+        temperature=0.8,
+        max_tokens=200,
+        priority=priority,
+        max_wait=max_wait,
+        stage="llm_gymbro",
+    )
+    tracing.record_usage("llm_gymbro", response.usage)
+    return response.choices[0].message.content
@@ -0,0 +1,140 @@
+"""
+Speculative Gym Bro translations.
+
+When enabled, the translation of a research answer starts in a background
+worker as soon as the answer is shown, and finished translations are cached
+by answer hash for every session in the process, so the Gym Bro click is
+usually instant. Speculation only runs while enough recent answers actually
+get a Gym Bro click and the shared Groq budget has headroom; otherwise the
+translation is made on demand as before.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+import admission
+import tracing
+
+load_dotenv()
+
+SPECULATE_ENABLED = os.getenv("GYMIQ_SPECULATE_GYMBRO", "0") == "1"
+CACHE_SIZE        = 512
+MIN_OBSERVATIONS  = 20     # answers seen before the click rate is trusted
+MIN_CLICK_RATE    = 0.3    # share of answers that must get a Gym Bro click
+MAX_BUDGET_USE    = 0.5    # skip speculation above this share of the TPM budget
+USAGE_HALF_LIFE   = 200    # answers after which old usage counts are halved
+
+_lock      = threading.Lock()
+_cache     = OrderedDict()   # answer hash -> translation
+_pending   = {}              # answer hash -> Future
+_clicked   = OrderedDict()   # answer hash -> None, to count one click per answer
+_answers   = 0
+_clicks    = 0
+_stats     = {"hits": 0, "misses": 0, "speculated": 0, "skipped": 0}
+_workers   = ThreadPoolExecutor(max_workers=2, thread_name_prefix="gymbro-speculate")
+
+
+def answer_key(answer: str) -> str:
+    return hashlib.sha256(answer.encode()).hexdigest()
+
+
+def _remember(od: OrderedDict, key: str, value):
+    od[key] = value
+    od.move_to_end(key)
+    while len(od) > CACHE_SIZE:
+        od.popitem(last=False)
+
+
+def should_speculate() -> bool:
+    if not SPECULATE_ENABLED:
+        return False
+    with _lock:
+        if _answers < MIN_OBSERVATIONS or _clicks / _answers < MIN_CLICK_RATE:
+            return False
+    budget = admission.controller.metrics()
+    if budget["queue_depth"] > 0:
+        return False
+    return budget["tokens_last_minute"] <= MAX_BUDGET_USE * budget["tpm_limit"]
+
+
+def _speculate(key: str, answer: str, translate):
+    try:
+        translation = translate(answer, priority=admission.PRIORITY_SPECULATIVE, max_wait=0)
+    except Exception:
+        with _lock:
+            _pending.pop(key, None)
+        raise
+    with _lock:
+        _remember(_cache, key, translation)
+        _pending.pop(key, None)
+    return translation
+
+
+def on_answer(answer: str, translate):
+    """Record a freshly shown answer and start translating it if speculation pays off."""
+    global _answers, _clicks
+    key = answer_key(answer)
+    with _lock:
+        _answers += 1
+        if _answers >= 2 * USAGE_HALF_LIFE:
+            _answers //= 2
+            _clicks //= 2
+        if key in _cache or key in _pending:
+            return
+    if not should_speculate():
+        with _lock:
+            _stats["skipped"] += 1
+        return
+    with _lock:
+        if key in _cache or key in _pending:
+            return
+        _stats["speculated"] += 1
+        _pending[key] = _workers.submit(_speculate, key, answer, translate)
+
+
+def get_translation(answer: str, translate) -> str:
+    """Return the Gym Bro translation, reusing a cached or in-flight speculation."""
+    global _clicks
+    key = answer_key(answer)
+    with _lock:
+        if key not in _clicked:
+            _clicks += 1
+            _remember(_clicked, key, None)
+        if key in _cache:
+            _stats["hits"] += 1
+            _cache.move_to_end(key)
+            tracing.count("gymbro_cache_hit")
+            return _cache[key]
+        future = _pending.get(key)
+
+    if future is not None:
+        try:
+            translation = future.result()
+            with _lock:
+                _stats["hits"] += 1
+            tracing.count("gymbro_cache_hit")
+            return translation
+        except Exception:
+            pass  # speculation was shed or failed; translate on demand below
+
+    tracing.count("gymbro_cache_miss")
+    translation = translate(answer)
+    with _lock:
+        _stats["misses"] += 1
+        _remember(_cache, key, translation)
+    return translation
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            **_stats,
+            "cached":     len(_cache),
+            "pending":    len(_pending),
+            "click_rate": _clicks / _answers if _answers else 0.0,
+        }
@@ -0,0 +1,174 @@
+"""
+Lightweight per-stage latency tracing for the question pipeline.
+
+Wrap a stage in `with span("name"):` to record its wall time; `count()` and
+`record_usage()` keep counters such as token usage and cache hits. Recent
+latencies are kept per stage and summarised as p50/p95/p99 on demand.
+
+Disabled by default: span() then returns a shared no-op context manager and
+the counters return immediately. With GYMIQ_TRACING=1, GYMIQ_METRICS_PORT
+serves Prometheus text on /metrics (on localhost unless GYMIQ_METRICS_HOST
+says otherwise) and GYMIQ_METRICS_LOG_INTERVAL logs a JSON snapshot every
+N seconds.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TRACING_ENABLED = os.getenv("GYMIQ_TRACING", "0") == "1"
+METRICS_PORT    = int(os.getenv("GYMIQ_METRICS_PORT", "0"))            # 0 disables /metrics
+METRICS_HOST    = os.getenv("GYMIQ_METRICS_HOST", "127.0.0.1")         # 0.0.0.0 exposes it publicly
+LOG_INTERVAL_S  = float(os.getenv("GYMIQ_METRICS_LOG_INTERVAL", "0"))  # 0 disables JSON logs
+SAMPLE_WINDOW   = 2048   # recent latencies kept per stage for percentiles
+QUANTILES       = (0.5, 0.95, 0.99)
+
+logger = logging.getLogger("gymiq.metrics")
+
+_lock     = threading.Lock()
+_samples  = defaultdict(lambda: deque(maxlen=SAMPLE_WINDOW))
+_totals   = defaultdict(lambda: [0, 0.0])   # stage -> [count, sum_seconds]
+_counters = defaultdict(int)
+_exporters_started = False
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str):
+    return _Span(name) if TRACING_ENABLED else _NOOP_SPAN
+
+
+def observe(stage: str, seconds: float):
+    if not TRACING_ENABLED:
+        return
+    with _lock:
+        _samples[stage].append(seconds)
+        totals = _totals[stage]
+        totals[0] += 1
+        totals[1] += seconds
+
+
+def count(name: str, n: int = 1):
+    if not TRACING_ENABLED:
+        return
+    with _lock:
+        _counters[name] += n
+
+
+def record_usage(stage: str, usage):
+    """Count prompt/completion tokens from a Groq response.usage object."""
+    if not TRACING_ENABLED or usage is None:
+        return
+    with _lock:
+        _counters[f"{stage}_prompt_tokens"] += usage.prompt_tokens
+        _counters[f"{stage}_completion_tokens"] += usage.completion_tokens
+
+
+def _quantile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def snapshot() -> dict:
+    with _lock:
+        samples  = {stage: sorted(values) for stage, values in _samples.items() if values}
+        totals   = {stage: list(t) for stage, t in _totals.items()}
+        counters = dict(_counters)
+
+    stages = {}
+    for stage, ordered in samples.items():
+        stages[stage] = {
+            "count":   totals[stage][0],
+            "sum_s":   totals[stage][1],
+            **{f"p{int(q * 100)}_ms": _quantile(ordered, q) * 1000 for q in QUANTILES},
+        }
+    return {"stages": stages, "counters": counters}
+
+
+def prometheus_text() -> str:
+    snap = snapshot()
+    lines = [
+        "# HELP gymiq_stage_seconds Wall time per pipeline stage.",
+        "# TYPE gymiq_stage_seconds summary",
+    ]
+    for stage, s in sorted(snap["stages"].items()):
+        for q in QUANTILES:
+            value = s[f"p{int(q * 100)}_ms"] / 1000
+            lines.append(f'gymiq_stage_seconds{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+        lines.append(f'gymiq_stage_seconds_sum{{stage="{stage}"}} {s["sum_s"]:.6f}')
+        lines.append(f'gymiq_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+    for name, value in sorted(snap["counters"].items()):
+        lines.append(f"# TYPE gymiq_{name}_total counter")
+        lines.append(f"gymiq_{name}_total {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _log_periodically():
+    while True:
+        time.sleep(LOG_INTERVAL_S)
+        logger.info(json.dumps(snapshot()))
+
+
+def start_exporters():
+    """Start the /metrics endpoint and JSON logger once per process, if configured."""
+    global _exporters_started
+    with _lock:
+        if _exporters_started or not TRACING_ENABLED:
+            return
+        _exporters_started = True
+
+    if METRICS_PORT:
+        server = ThreadingHTTPServer((METRICS_HOST, METRICS_PORT), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    if LOG_INTERVAL_S > 0:
+        if not logger.handlers:
+            logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.INFO)
+        threading.Thread(target=_log_periodically, name="metrics-log", daemon=True).start()